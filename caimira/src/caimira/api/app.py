@@ -3,6 +3,8 @@
 # """
 
 import argparse
+import concurrent.futures
+import os
 import tornado.ioloop
 import tornado.web
 import tornado.log
@@ -16,6 +18,13 @@ class Application(tornado.web.Application):
     def __init__(self, debug):
         settings = dict(
             debug=debug,
+            # gzip the (JSON) responses for clients which accept it
+            compress_response=True,
+            # The worker processes of the CO2 batch fits: CO2_BATCH_WORKERS,
+            # or by default the number of CPUs. They are started on demand.
+            co2_batch_executor=concurrent.futures.ProcessPoolExecutor(
+                max_workers=int(os.environ.get("CO2_BATCH_WORKERS", 0)) or None,
+            ),
         )
         super().__init__(routes, **settings)
 
@@ -10,7 +10,7 @@ def generate_form_obj(form_data: typing.Dict, data_registry: DataRegistry) -> CO
 
 
 def generate_model(form_obj: CO2FormData) -> CO2DataModel:
-    return form_obj.build_model()
+    return form_obj.build_CO2_data_model()
 
 
 def generate_report(model: CO2DataModel) -> typing.Dict:
@@ -52,3 +52,15 @@ def request_CO2_report(form_data: typing.Dict) -> typing.Dict:
     report_data: typing.Dict = generate_report(model=model)
 
     return report_data
+
+
+def request_CO2_room_report(room_id: str, form_data: typing.Dict) -> typing.Dict:
+    """
+    Fit the CO2 data of a single room of a batch. A failure is returned
+    (rather than raised), so that an invalid room does not fail the batch.
+    """
+    try:
+        report_data = request_CO2_report(form_data)
+    except Exception as err:
+        return {"room": room_id, "status": "error", "message": str(err)}
+    return {"room": room_id, "status": "success", "results": report_data}
@@ -0,0 +1,116 @@
+"""
+Encoding of the report data returned by the APIs.
+
+Two formats are supported:
+
+* ``application/json`` (the default): numeric arrays are written as lists
+  of floats;
+* ``application/msgpack`` (opt-in, through the ``Accept`` header, and only
+  if the optional ``msgpack`` package is installed): every numeric array or
+  sequence of numbers is written as a map
+  ``{"dtype": "<f4", "shape": [...], "data": <bytes>}`` holding the values as
+  little-endian float32, which is several times smaller and faster to encode
+  than the equivalent JSON for the Monte Carlo samples.
+
+Reports which are streamed, stage by stage, are written either as
+Server-Sent Events (``text/event-stream``) or as newline-delimited JSON
+(``application/x-ndjson``, the default): one event per report stage.
+
+"""
+import json
+import numbers
+import typing
+
+import numpy as np
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+JSON_CONTENT_TYPE = 'application/json; charset=UTF-8'
+MSGPACK_CONTENT_TYPE = 'application/msgpack'
+SSE_CONTENT_TYPE = 'text/event-stream; charset=UTF-8'
+NDJSON_CONTENT_TYPE = 'application/x-ndjson; charset=UTF-8'
+
+_MSGPACK_MEDIA_TYPES = ('application/msgpack', 'application/x-msgpack', 'application/vnd.msgpack')
+
+
+def negotiate_format(accept_header: typing.Optional[str]) -> str:
+    """
+    Return the response format (``"msgpack"`` or ``"json"``) for the given
+    ``Accept`` header. MessagePack is only used when explicitly accepted,
+    and available.
+    """
+    if msgpack is None or not accept_header:
+        return 'json'
+    for media_range in accept_header.split(','):
+        media_type, _, params = media_range.partition(';')
+        if media_type.strip().lower() in _MSGPACK_MEDIA_TYPES and params.replace(' ', '') != 'q=0':
+            return 'msgpack'
+    return 'json'
+
+
+def _is_numeric_sequence(obj) -> bool:
+    return (isinstance(obj, (list, tuple)) and len(obj) > 0 and
+            all(isinstance(item, numbers.Real) and not isinstance(item, bool) for item in obj))
+
+
+def _pack_array(values) -> typing.Dict[str, typing.Any]:
+    array = np.asarray(values, dtype='<f4')
+    return {'dtype': '<f4', 'shape': list(array.shape), 'data': array.tobytes()}
+
+
+def to_serializable(obj, packed_arrays: bool = False):
+    """
+    Convert the report data into plain Python objects. NumPy scalars become
+    Python numbers. Arrays (and, if ``packed_arrays``, sequences of numbers)
+    become lists, or packed float32 maps if ``packed_arrays`` is True.
+    """
+    if isinstance(obj, dict):
+        return {str(key): to_serializable(value, packed_arrays) for key, value in obj.items()}
+    if isinstance(obj, np.ndarray):
+        if packed_arrays and obj.dtype.kind in 'fiu':
+            return _pack_array(obj)
+        return obj.tolist()
+    if packed_arrays and _is_numeric_sequence(obj):
+        return _pack_array(obj)
+    if isinstance(obj, (list, tuple)):
+        return [to_serializable(item, packed_arrays) for item in obj]
+    if isinstance(obj, np.generic):
+        return obj.item()
+    return obj
+
+
+def encode(data: typing.Dict[str, typing.Any], fmt: str = 'json') -> typing.Tuple[bytes, str]:
+    """
+    Encode the given (report) data in the requested format.
+    Returns the body and its content type.
+    """
+    if fmt == 'msgpack':
+        if msgpack is None:
+            raise ValueError("The msgpack package is required for the msgpack format")
+        return msgpack.packb(to_serializable(data, packed_arrays=True)), MSGPACK_CONTENT_TYPE
+    return json.dumps(to_serializable(data)).encode('utf-8'), JSON_CONTENT_TYPE
+
+
+def negotiate_stream_format(accept_header: typing.Optional[str]) -> str:
+    """
+    Return the streaming format (``"sse"`` or ``"ndjson"``) for the given
+    ``Accept`` header.
+    """
+    if accept_header and 'text/event-stream' in accept_header.lower():
+        return 'sse'
+    return 'ndjson'
+
+
+def encode_event(stage: str, data: typing.Any, fmt: str = 'ndjson') -> bytes:
+    """
+    Encode the data of a single (report) stage as an event of the given
+    streaming format.
+    """
+    data = to_serializable(data)
+    if fmt == 'sse':
+        return f'event: {stage}\ndata: {json.dumps(data)}\n\n'.encode('utf-8')
+    return (json.dumps({'stage': stage, 'data': data}) + '\n').encode('utf-8')
@@ -24,16 +24,28 @@ def generate_report(form_obj: VirusFormData, report_generation_parallelism: typi
     )
 
 
-def submit_virus_form(form_data: typing.Dict, report_generation_parallelism: typing.Optional[int]) -> typing.Dict:
-    data_registry: DataRegistry = DataRegistry()
-
-    form_obj: VirusFormData = generate_form_obj(form_data=form_data, data_registry=data_registry)
-    report_data: typing.Dict = generate_report(form_obj=form_obj, report_generation_parallelism=report_generation_parallelism)
-
+def strip_models(report_data: typing.Dict, include_model_repr: bool = False) -> typing.Dict:
+    """
+    Remove the model objects from the report data, so that it can be
+    serialised. The (large) representation of the model is only kept
+    when ``include_model_repr`` is True.
+    """
     # Handle model representation
-    if report_data['model']:
+    if include_model_repr and report_data['model']:
         report_data['model'] = repr(report_data['model'])
+    else:
+        del report_data['model']
     for single_group_output in report_data['groups'].values():
         del single_group_output['model'] # Model representation per group not needed
 
     return report_data
+
+
+def submit_virus_form(form_data: typing.Dict, report_generation_parallelism: typing.Optional[int],
+                      include_model_repr: bool = False) -> typing.Dict:
+    data_registry: DataRegistry = DataRegistry()
+
+    form_obj: VirusFormData = generate_form_obj(form_data=form_data, data_registry=data_registry)
+    report_data: typing.Dict = generate_report(form_obj=form_obj, report_generation_parallelism=report_generation_parallelism)
+
+    return strip_models(report_data, include_model_repr)
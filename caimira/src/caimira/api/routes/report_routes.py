@@ -1,9 +1,11 @@
+import asyncio
 import json
 import traceback
 import sys
 from caimira.api.routes.base_handler import BaseRequestHandler
 from caimira.api.controller.virus_report_controller import submit_virus_form
-from caimira.api.controller.co2_report_controller import request_CO2_transition_times, request_CO2_report
+from caimira.api.controller.co2_report_controller import request_CO2_transition_times, request_CO2_report, request_CO2_room_report
+from caimira.api.controller import report_serializer
 
 
 class VirusReportHandler(BaseRequestHandler):
@@ -16,8 +18,10 @@ class VirusReportHandler(BaseRequestHandler):
                 report_generation_parallelism = int(arguments['report_generation_parallelism'][0])
             except (ValueError, IndexError, KeyError):
                 report_generation_parallelism = None
+            # The (large) model representation is only returned on request
+            include_model_repr = self.get_argument('include_model', '0') == '1'
 
-            report_data = submit_virus_form(form_data, report_generation_parallelism)
+            report_data = submit_virus_form(form_data, report_generation_parallelism, include_model_repr)
 
             response_data = {
                 "status": "success",
@@ -25,7 +29,10 @@ class VirusReportHandler(BaseRequestHandler):
                 "results": report_data,
             }
 
-            self.write(response_data)
+            body, content_type = report_serializer.encode(
+                response_data, report_serializer.negotiate_format(self.request.headers.get('Accept')))
+            self.set_header('Content-Type', content_type)
+            self.write(body)
         except Exception as e:
             traceback.print_exc()
             self.write_error(status_code=400, exc_info=sys.exc_info())
@@ -65,3 +72,33 @@ class CO2ReportHandler(BaseRequestHandler):
         except Exception as e:
             traceback.print_exc()
             self.write_error(status_code=400, exc_info=sys.exc_info())
+
+
+class CO2BatchReportHandler(BaseRequestHandler):
+    async def post(self):
+        try:
+            rooms = json.loads(self.request.body)["rooms"]
+            if not isinstance(rooms, dict) or not rooms:
+                raise ValueError('"rooms" must map the room identifiers to their CO2 form data.')
+        except Exception as e:
+            traceback.print_exc()
+            self.write_error(status_code=400, exc_info=sys.exc_info())
+            return
+
+        # The rooms are fitted in parallel (in the worker processes), and each
+        # result is streamed (as NDJSON, or SSE on request) as soon as it is ready.
+        fmt = report_serializer.negotiate_stream_format(self.request.headers.get('Accept'))
+        self.set_header('Content-Type', report_serializer.SSE_CONTENT_TYPE if fmt == 'sse'
+                        else report_serializer.NDJSON_CONTENT_TYPE)
+        executor = self.settings['co2_batch_executor']
+        room_reports = [
+            asyncio.wrap_future(executor.submit(request_CO2_room_report, room_id, form_data))
+            for room_id, form_data in rooms.items()
+        ]
+        failed = 0
+        for room_report in asyncio.as_completed(room_reports):
+            room_data = await room_report
+            failed += room_data["status"] != "success"
+            self.write(report_serializer.encode_event('room', room_data, fmt))
+            await self.flush()
+        self.write(report_serializer.encode_event('done', {"rooms": len(rooms), "failed": failed}, fmt))
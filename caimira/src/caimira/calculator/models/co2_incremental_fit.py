@@ -0,0 +1,116 @@
+# This module is part of CAiMIRA. Please see the repository at
+# https://gitlab.cern.ch/caimira/caimira for details of the license and terms of use.
+"""
+Incremental fit of the ventilation to a live CO2 sensor feed.
+
+Rather than fitting the whole history from scratch whenever new readings
+arrive, :class:`IncrementalCO2Fit` keeps the latest readings in a ring
+buffer, along with the current fit (the exhalation rate and the
+ventilation value of each interval). On update, the fit starts from the
+previous solution, and only the exhalation rate and the ventilation values
+of the intervals which received new readings are refitted.
+
+For example::
+
+    >>> live_fit = IncrementalCO2Fit(data_registry, room, occupancy, ventilation_transition_times)
+    >>> for times, CO2_concentrations in sensor_feed:
+    ...     fit_results = live_fit.update(times, CO2_concentrations)
+
+"""
+import typing
+
+import numpy as np
+
+from caimira.calculator.store.data_registry import DataRegistry
+from . import models
+
+
+class _RingBuffer:
+    """A fixed-capacity buffer of floats, dropping the oldest values when full."""
+    def __init__(self, capacity: int):
+        self._data = np.empty(capacity, dtype=float)
+        self._start = 0
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def extend(self, values: np.ndarray) -> None:
+        capacity = len(self._data)
+        values = values[-capacity:]
+        end = (self._start + self._size) % capacity
+        indices = (end + np.arange(len(values))) % capacity
+        self._data[indices] = values
+        dropped = max(0, self._size + len(values) - capacity)
+        self._start = (self._start + dropped) % capacity
+        self._size = min(capacity, self._size + len(values))
+
+    def values(self) -> np.ndarray:
+        """The buffered values, from the oldest to the newest."""
+        return self._data[(self._start + np.arange(self._size)) % len(self._data)]
+
+
+class IncrementalCO2Fit:
+    def __init__(
+            self,
+            data_registry: DataRegistry,
+            room: models.Room,
+            occupancy: models.IntPiecewiseConstant,
+            ventilation_transition_times: typing.Tuple[float, ...],
+            buffer_size: int = 10_000,
+    ):
+        self.data_registry = data_registry
+        self.room = room
+        self.occupancy = occupancy
+        self.ventilation_transition_times = ventilation_transition_times
+        self._times = _RingBuffer(buffer_size)
+        self._CO2_concentrations = _RingBuffer(buffer_size)
+
+        #: The current fit: the exhalation rate followed by the ventilation
+        #: values (ACH), or None before the first fit.
+        self.params: typing.Optional[np.ndarray] = None
+
+    def data_model(self) -> models.CO2DataModel:
+        """The CO2 data model of the buffered readings."""
+        return models.CO2DataModel(
+            data_registry=self.data_registry,
+            room=self.room,
+            occupancy=self.occupancy,
+            ventilation_transition_times=self.ventilation_transition_times,
+            times=self._times.values(),
+            CO2_concentrations=self._CO2_concentrations.values(),
+        )
+
+    def intervals(self, times: np.ndarray) -> np.ndarray:
+        """The (indices of the) ventilation intervals of the given times."""
+        n_values = len(self.ventilation_transition_times) - 1
+        indices = np.searchsorted(np.array(self.ventilation_transition_times, dtype=float), times, side='left') - 1
+        return np.unique(np.clip(indices, 0, n_values - 1))
+
+    def update(self, times: typing.Sequence[float],
+               CO2_concentrations: typing.Sequence[float]) -> typing.Optional[typing.Dict]:
+        """
+        Add the new readings to the buffer, and update the fit. Returns the
+        fit results (as :meth:`CO2DataModel.CO2_fit_params`), or None while
+        fewer than two readings are buffered.
+        """
+        new_times = np.asarray(times, dtype=float)
+        new_CO2_concentrations = np.asarray(CO2_concentrations, dtype=float)
+        if len(new_times) != len(new_CO2_concentrations):
+            raise ValueError('times and CO2_concentrations must have same length.')
+        if np.any(np.diff(new_times) <= 0) or (
+                len(new_times) and len(self._times) and new_times[0] <= self._times.values()[-1]):
+            raise ValueError('The new readings must be sorted, and follow the buffered ones.')
+
+        self._times.extend(new_times)
+        self._CO2_concentrations.extend(new_CO2_concentrations)
+        if len(self._times) < 2:
+            return None
+
+        if self.params is None:
+            fit_results = self.data_model().CO2_fit_params()
+        else:
+            fit_results = self.data_model().CO2_fit_params(
+                initial_params=self.params, fitted_intervals=self.intervals(new_times))
+        self.params = np.array([fit_results['exhalation_rate']] + list(fit_results['ventilation_values']))
+        return fit_results
@@ -1,3 +1,6 @@
+import functools
+import typing
+
 import numpy as np
 from caimira.calculator.models import models
 from .weather import wx_data, nearest_wx_station
@@ -17,29 +20,46 @@ def get_hourly_temperatures_celsius_per_hour(coordinates):
             in enumerate(wx_data()[wx_station_id].items())}
 
 
-# Load the weather data (temperature in kelvin) for Geneva.
 geneva_coordinates = (46.204391, 6.143158)
-local_hourly_temperatures_celsius_per_hour = get_hourly_temperatures_celsius_per_hour(
-    geneva_coordinates)
-
-
-# Geneva hourly temperatures as piecewise constant function (in Kelvin).
-GenevaTemperatures_hourly = {
-    month: models.PiecewiseConstant(
-        # NOTE:  It is important that the time type is float, not np.float, in
-        # order to allow hashability (for caching).
-        tuple(float(time) for time in range(25)),
-        tuple(273.15 + np.array(temperatures)),
-    )
-    for month, temperatures in local_hourly_temperatures_celsius_per_hour.items()
-}
 
 
-# Same Geneva temperatures on a finer temperature mesh (every 6 minutes).
-GenevaTemperatures = {
-    month: GenevaTemperatures_hourly[month].refine(refine_factor=10)
-    for month, temperatures in local_hourly_temperatures_celsius_per_hour.items()
-}
+@functools.lru_cache()
+def _geneva_temperatures() -> typing.Dict[str, typing.Any]:
+    # Load the weather data (temperature in kelvin) for Geneva.
+    local_hourly_temperatures_celsius_per_hour = get_hourly_temperatures_celsius_per_hour(
+        geneva_coordinates)
+
+    # Geneva hourly temperatures as piecewise constant function (in Kelvin).
+    GenevaTemperatures_hourly = {
+        month: models.PiecewiseConstant(
+            # NOTE:  It is important that the time type is float, not np.float, in
+            # order to allow hashability (for caching).
+            tuple(float(time) for time in range(25)),
+            tuple(273.15 + np.array(temperatures)),
+        )
+        for month, temperatures in local_hourly_temperatures_celsius_per_hour.items()
+    }
+
+    # Same Geneva temperatures on a finer temperature mesh (every 6 minutes).
+    GenevaTemperatures = {
+        month: GenevaTemperatures_hourly[month].refine(refine_factor=10)
+        for month, temperatures in local_hourly_temperatures_celsius_per_hour.items()
+    }
+    return {
+        'local_hourly_temperatures_celsius_per_hour': local_hourly_temperatures_celsius_per_hour,
+        'GenevaTemperatures_hourly': GenevaTemperatures_hourly,
+        'GenevaTemperatures': GenevaTemperatures,
+    }
+
+
+def __getattr__(name: str) -> typing.Any:
+    # The Geneva temperatures are only computed on first access, as loading
+    # the weather data is (by far) the most expensive part of importing
+    # the models.
+    if name in ('local_hourly_temperatures_celsius_per_hour',
+                'GenevaTemperatures_hourly', 'GenevaTemperatures'):
+        return _geneva_temperatures()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 # ------- VACCINATION DATA -------
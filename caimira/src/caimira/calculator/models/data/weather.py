@@ -6,9 +6,11 @@ import typing
 
 import dateutil.tz
 import numpy as np
-from scipy.spatial import cKDTree
 from timezonefinder import TimezoneFinder
 
+if typing.TYPE_CHECKING:
+    from scipy.spatial import cKDTree
+
 
 WX_DATA_LOCATION = Path(__file__).absolute().parent
 WxStationIdType = str
@@ -64,8 +66,10 @@ def wx_station_data() -> typing.Dict[WxStationIdType, WxStationRecordType]:
 
 
 @functools.lru_cache()
-def _wx_station_kdtree() -> cKDTree:
+def _wx_station_kdtree() -> "cKDTree":
     """Build a kd-tree of wx station longitude & latitudes (note the coordinate order)"""
+    from scipy.spatial import cKDTree
+
     station_data = wx_station_data().values()
     coords = np.array([(stn_record[3], stn_record[2])
                       for stn_record in station_data])
@@ -36,28 +36,40 @@ from dataclasses import dataclass
 import typing
 
 import numpy as np
-from scipy.interpolate import interp1d
-import scipy.stats as sct
-from scipy.optimize import minimize
 
 from caimira.calculator.store.data_registry import DataRegistry
 
-if not typing.TYPE_CHECKING:
-    from memoization import cached
-else:
-    # Workaround issue https://github.com/lonelyenvoy/python-memoization/issues/18
-    # by providing a no-op cache decorator when type-checking.
-    cached = lambda *cached_args, **cached_kwargs: lambda function: function  # noqa
-
-from .utils import method_cache
+from .utils import identity_cache, method_cache
 
 from .dataclass_utils import nested_replace, replace_concentration_model_properties
 
 oneoverln2 = 1 / np.log(2)
 # Define types for items supporting vectorisation. In the future this may be replaced
 # by ``np.ndarray[<type>]`` once/if that syntax is supported. Note that vectorization
-# implies 1d arrays: multi-dimensional arrays are not supported.
+# implies 1d arrays over the Monte-Carlo samples. The only multi-dimensional arrays
+# supported are those of a parameter sweep, which carry an additional leading axis
+# of scenarios (see :mod:`caimira.calculator.models.sweep`).
 _VectorisedFloat = typing.Union[float, np.ndarray]
+
+
+def _sample_mean(values: _VectorisedFloat) -> _VectorisedFloat:
+    """
+    Monte-Carlo average over the samples, i.e. over the last axis.
+    A leading scenario axis, if any, is preserved (as a column) so that
+    the result still broadcasts against the samples of that scenario.
+    """
+    values = np.asarray(values)
+    if values.ndim > 1:
+        return values.mean(axis=-1, keepdims=True)
+    return values.mean()
+
+
+def _is_sample_independent(value: _VectorisedFloat) -> bool:
+    """
+    Whether a value is the same for all the Monte-Carlo samples: either
+    a scalar, or a column of values along the scenario axis of a sweep.
+    """
+    return np.isscalar(value) or (np.ndim(value) > 1 and np.shape(value)[-1] == 1)
 _VectorisedInt = typing.Union[int, np.ndarray]
 
 Time_t = typing.TypeVar('Time_t', float, int)
@@ -119,6 +131,7 @@ class PeriodicInterval(Interval):
     #: Time at which the first person (infected or exposed) arrives at the enclosed space.
     start: float = 0.0
 
+    @method_cache
     def boundaries(self) -> BoundarySequence_t:
         if self.period == 0 or self.duration == 0:
             return tuple()
@@ -177,6 +190,8 @@ class PiecewiseConstant:
         # using a linear interpolation in-between the initial mesh points
         refined_times = np.linspace(self.transition_times[0], self.transition_times[-1],
                                     (len(self.transition_times)-1) * refine_factor+1)
+        from scipy.interpolate import interp1d
+
         interpolator = interp1d(
             self.transition_times,
             np.concatenate([self.values, self.values[-1:]], axis=0),
@@ -236,6 +251,13 @@ class _VentilationBase:
     def transition_times(self, room: Room) -> typing.Set[float]:
         raise NotImplementedError("Subclass must implement")
 
+    def interval_transition_times(self) -> typing.FrozenSet[float]:
+        """
+        The transition times of the :class:`Interval` objects of this
+        ventilation (i.e. excluding outside temperature changes).
+        """
+        return frozenset()
+
     def air_exchange(self, room: Room, time: float) -> _VectorisedFloat:
         """
         Returns the rate at which air is being exchanged in the given room
@@ -257,6 +279,10 @@ class Ventilation(_VentilationBase):
     def transition_times(self, room: Room) -> typing.Set[float]:
         return self.active.transition_times()
 
+    @method_cache
+    def interval_transition_times(self) -> typing.FrozenSet[float]:
+        return frozenset(self.active.transition_times())
+
 
 @dataclass(frozen=True)
 class MultipleVentilation(_VentilationBase):
@@ -275,15 +301,21 @@ class MultipleVentilation(_VentilationBase):
             transitions.update(ventilation.transition_times(room))
         return transitions
 
+    @method_cache
+    def interval_transition_times(self) -> typing.FrozenSet[float]:
+        return frozenset().union(*(
+            ventilation.interval_transition_times() for ventilation in self.ventilations
+        ))
+
     def air_exchange(self, room: Room, time: float) -> _VectorisedFloat:
         """
         Returns the rate at which air is being exchanged in the given room
         at a given time (in hours).
         """
-        return np.array([
+        return sum([
             ventilation.air_exchange(room, time)
             for ventilation in self.ventilations
-        ], dtype=object).sum(axis=0)
+        ])
 
 
 @dataclass(frozen=True)
@@ -585,18 +617,7 @@ class Mask:
             # When η_exhale is specified, return it directly
             return self.η_exhale
 
-        d = np.array(diameter)
-        intermediate_range1 = np.bitwise_and(0.5 <= d, d < 0.94614)
-        intermediate_range2 = np.bitwise_and(0.94614 <= d, d < 3.)
-
-        eta_out = np.empty(d.shape, dtype=np.float64)
-
-        eta_out[d < 0.5] = 0.
-        eta_out[intermediate_range1] = 0.5893 * d[intermediate_range1] + 0.1546
-        eta_out[intermediate_range2] = 0.0509 * d[intermediate_range2] + 0.664
-        eta_out[d >= 3.] = 0.8167
-
-        return eta_out*self.factor_exhale
+        return _exhale_efficiency(diameter, self.factor_exhale)
 
     def inhale_efficiency(self) -> _VectorisedFloat:
         """
@@ -605,6 +626,24 @@ class Mask:
         return self.η_inhale
 
 
+@identity_cache
+def _exhale_efficiency(diameter: _VectorisedFloat, factor_exhale: float) -> _VectorisedFloat:
+    # The diameter-dependent exhale efficiency of Mask.exhale_efficiency
+    # (shared by all the masks of the same factor_exhale).
+    d = np.array(diameter)
+    intermediate_range1 = np.bitwise_and(0.5 <= d, d < 0.94614)
+    intermediate_range2 = np.bitwise_and(0.94614 <= d, d < 3.)
+
+    eta_out = np.empty(d.shape, dtype=np.result_type(d.dtype, np.float32))
+
+    eta_out[d < 0.5] = 0.
+    eta_out[intermediate_range1] = 0.5893 * d[intermediate_range1] + 0.1546
+    eta_out[intermediate_range2] = 0.0509 * d[intermediate_range2] + 0.664
+    eta_out[d >= 3.] = 0.8167
+
+    return eta_out*factor_exhale
+
+
 # Example of Masks only used for the Expert app and tests.
 Mask.types = {
     'No mask': Mask(0, 0),
@@ -664,14 +703,21 @@ class Particle:
             fdep = 0.6
         else:
             # deposition fraction depends on aerosol particle diameter.
-            d = (self.diameter * evaporation_factor)
-            IFrac = 1 - 0.5 * (1 - (1 / (1 + (0.00076*(d**2.8)))))
-            fdep = IFrac * (0.0587 # type: ignore
-                    + (0.911/(1 + np.exp(4.77 + 1.485 * np.log(d))))
-                    + (0.943/(1 + np.exp(0.508 - 2.58 * np.log(d))))) # type: ignore
+            fdep = _fraction_deposited(self.diameter, evaporation_factor)
         return fdep
 
 
+@identity_cache
+def _fraction_deposited(diameter: _VectorisedFloat, evaporation_factor: float) -> _VectorisedFloat:
+    # The diameter-dependent fraction deposited of Particle.fraction_deposited,
+    # shared by all the particles of the same (sampled) diameters.
+    d = (diameter * evaporation_factor)
+    IFrac = 1 - 0.5 * (1 - (1 / (1 + (0.00076*(d**2.8)))))
+    return IFrac * (0.0587 # type: ignore
+            + (0.911/(1 + np.exp(4.77 + 1.485 * np.log(d))))
+            + (0.943/(1 + np.exp(0.508 - 2.58 * np.log(d))))) # type: ignore
+
+
 @dataclass(frozen=True)
 class _ExpirationBase:
     """
@@ -721,19 +767,25 @@ class Expiration(_ExpirationBase):
         """
         return Particle(diameter=self.diameter)
 
-    @cached()
     def aerosols(self, mask: Mask):
         """
         Total volume of aerosols expired per volume 
         of exhaled air considering the outward mask 
         efficiency. Result is in mL.cm^-3.
         """
-        def volume(d):
-            return (np.pi * d**3) / 6.
+        return _aerosols(self.diameter, self.cn, mask.exhale_efficiency(self.diameter))
+
+
+@identity_cache
+def _aerosols(diameter: _VectorisedFloat, cn: float, exhale_efficiency: _VectorisedFloat) -> _VectorisedFloat:
+    # The aerosol volume of Expiration.aerosols, cached on the identity of
+    # the (sampled) diameters and of the (diameter-dependent) mask efficiency.
+    def volume(d):
+        return (np.pi * d**3) / 6.
 
-        # Final result converted from microns^3/cm3 to mL/cm^3
-        return self.cn * (volume(self.diameter) *
-                (1 - mask.exhale_efficiency(self.diameter))) * 1e-12
+    # Final result converted from microns^3/cm3 to mL/cm^3
+    return cn * (volume(diameter) *
+            (1 - exhale_efficiency)) * 1e-12
 
 
 @dataclass(frozen=True)
@@ -829,6 +881,15 @@ class SimplePopulation:
         elif isinstance(self.number, IntPiecewiseConstant):
             return self.number.interval()
 
+    @method_cache
+    def interval_transition_times(self) -> typing.FrozenSet[float]:
+        """
+        The transition times of the presence :class:`Interval`, if any.
+        """
+        if isinstance(self.presence, Interval):
+            return frozenset(self.presence.transition_times())
+        return frozenset()
+
     def person_present(self, time: float):
         # Allow back-compatibility
         if isinstance(self.number, int) and isinstance(self.presence, Interval):
@@ -1015,6 +1076,8 @@ class Cases:
         Probability to meet n_infected persons in an event.
         From https://doi.org/10.1038/s41562-020-01000-9.
         """
+        import scipy.stats as sct
+
         return sct.binom.pmf(n_infected, event_population, self.probability_random_individual(virus))
 
 
@@ -1073,15 +1136,25 @@ class _ConcentrationModelBase:
         RR = self.removal_rate(time)
 
         if isinstance(RR, np.ndarray):
-            invRR = np.empty(RR.shape, dtype=np.float64)
-            invRR[RR == 0.] = np.nan
-            invRR[RR != 0.] = 1. / RR[RR != 0.]
+            # Keep the floating point type of the samples (e.g. float32).
+            invRR = np.full(RR.shape, np.nan, dtype=np.result_type(RR.dtype, np.float32))
+            np.divide(1., RR, out=invRR, where=RR != 0.)
         else:
             invRR = np.nan if RR == 0. else 1. / RR # type: ignore
 
         return (self.population.people_present(time) * invRR / V +
                 self.min_background_concentration()/self.normalization_factor())
 
+    @method_cache
+    def interval_transition_times(self) -> typing.FrozenSet[float]:
+        """
+        The transition times of all the :class:`Interval` objects of this
+        model (presence and ventilation), i.e. excluding the temperature
+        and occupancy profile (PiecewiseConstant) based changes.
+        """
+        return (self.population.interval_transition_times() |
+                self.ventilation.interval_transition_times())
+
     @method_cache
     def state_change_times(self) -> typing.List[float]:
         """
@@ -1149,10 +1222,13 @@ class _ConcentrationModelBase:
 
         fac = np.exp(-RR * delta_time)
         if isinstance(RR, np.ndarray):
-            curr_conc_state = np.empty(RR.shape, dtype=np.float64)
-            curr_conc_state[RR == 0.] = delta_time * self.population.people_present(time) / (
-                self.room.volume[RR == 0.] if isinstance(self.room.volume,np.ndarray) else self.room.volume)
-            curr_conc_state[RR != 0.] = self._normed_concentration_limit(time)[RR != 0.] * (1 - fac[RR != 0.])
+            # np.where (rather than boolean indexing) lets the room volume
+            # broadcast against RR, e.g. along the scenario axis of a sweep.
+            curr_conc_state = np.where(
+                RR == 0.,
+                delta_time * self.population.people_present(time) / self.room.volume,
+                self._normed_concentration_limit(time) * (1 - fac),
+            )
         else:
             if RR == 0.:
                 curr_conc_state = delta_time * self.population.people_present(time) / self.room.volume
@@ -1184,7 +1260,8 @@ class _ConcentrationModelBase:
         if stop > change_times[-1]:
             change_times.append(stop)
         req_start, req_stop = start, stop
-        total_normed_concentration = 0.
+        # Accumulated in float64, even with float32 samples.
+        total_normed_concentration: _VectorisedFloat = np.float64(0.)
         for interval_start, interval_stop in zip(change_times[:-1], change_times[1:]):
             if req_start > interval_stop or req_stop < interval_start:
                 continue
@@ -1246,9 +1323,12 @@ class ConcentrationModel(_ConcentrationModelBase):
         h = 1.5
         # Deposition rate (h^-1)
         k = (vg * 3600) / h
+        # The (sample-independent) decay and air exchange rates are added in
+        # the floating point type of the sampled deposition rate, e.g. float32.
+        dtype = getattr(k, 'dtype', np.float64)
         return (
-            k + self.virus.decay_constant(self.room.humidity, self.room.inside_temp.value(time))
-            + self.ventilation.air_exchange(self.room, time)
+            k + np.asarray(self.virus.decay_constant(self.room.humidity, self.room.inside_temp.value(time))
+                           + self.ventilation.air_exchange(self.room, time), dtype=dtype)
         )
 
     def infectious_virus_removal_rate(self, time: float) -> _VectorisedFloat:
@@ -1326,9 +1406,12 @@ class ShortRangeModel:
         if self.presence.boundaries()[0][0] < self.infected.presence.boundaries()[0][0] or self.presence.boundaries()[-1][-1] > self.infected.presence.boundaries()[-1][-1]:
             raise ValueError("The short-range-interaction cannot last longer than the presence of the infected.")
     
+    @method_cache
     def dilution_factor(self) -> _VectorisedFloat:
         '''
         The dilution factor for the respective expiratory activity type.
+        It only depends on the (sampled) exhalation rate and distance, and
+        is therefore computed once per model, rather than at every time step.
         '''
         _dilution_factor = self.data_registry.short_range_model['dilution_factor'] 
         # Average mouth opening diameter (m)
@@ -1373,13 +1456,11 @@ class ShortRangeModel:
         Sxstar = np.array(2*𝛽r1*(xstar+x0)/mouth_diameter)
 
         distances = np.array(self.distance)
-        factors = np.empty(distances.shape, dtype=np.float64)
-        factors[distances < xstar] = 2*𝛽r1*(distances[distances < xstar]
-                                        + x0)/mouth_diameter
-        factors[distances >= xstar] = Sxstar[distances >= xstar]*(1 +
-            𝛽r2*(distances[distances >= xstar] -
-            xstar[distances >= xstar])/𝛽r1/(xstar[distances >= xstar]
-            + x0))**3
+        factors = np.where(
+            distances < xstar,
+            2*𝛽r1*(distances + x0)/mouth_diameter,
+            Sxstar*(1 + 𝛽r2*(distances - xstar)/𝛽r1/(xstar + x0))**3,
+        )
         return factors
     
     def _normed_jet_origin_concentration(self) -> _VectorisedFloat:
@@ -1391,6 +1472,7 @@ class ShortRangeModel:
         # The short range origin concentration does not consider the mask contribution.
         return self.expiration.aerosols(mask=Mask.types['No mask'])
     
+    @method_cache
     def _normed_diluted_jet_concentration(self):
         return 1/self.dilution_factor()*self._normed_jet_origin_concentration()
 
@@ -1416,6 +1498,15 @@ class ShortRangeModel:
         """
         return (self._normed_diluted_jet_concentration() * self.normalization_factor())
 
+    @method_cache
+    def interval_transition_times(self) -> typing.FrozenSet[float]:
+        """
+        The transition times of the short-range interaction and of the
+        presence of the infected.
+        """
+        return (frozenset(self.presence.transition_times()) |
+                self.infected.interval_transition_times())
+
     @method_cache
     def extract_between_bounds(self, time1: float, time2: float) -> typing.Union[None, typing.Tuple[float,float]]:
         """
@@ -1440,6 +1531,20 @@ class ShortRangeModel:
         elif time1 <= start and stop < time2:
             return start, stop
 
+    def overlap_durations(self, times: typing.Sequence[float]) -> np.ndarray:
+        """
+        The durations of the intersections of the presence interval with
+        each of the intervals between consecutive times (i.e. the vectorised
+        equivalent of :meth:`extract_between_bounds`).
+        Raise an error if the times are not in ascending order.
+        """
+        times = np.asarray(times, dtype=float)
+        if np.any(np.diff(times) < 0):
+            raise ValueError("times must be in ascending order")
+
+        start, stop = self.presence.boundaries()[0]
+        return np.maximum(np.minimum(times[1:], stop) - np.maximum(times[:-1], start), 0.)
+
     def _normed_jet_exposure_between_bounds(self,
                     time1: float, time2: float):
         """
@@ -1489,7 +1594,110 @@ class CO2DataModel:
         # Calculate the predictive CO2 concentration
         return [CO2_concentration_model.concentration(time) for time in self.times]
 
-    def CO2_fit_params(self) -> typing.Dict:
+    @method_cache
+    def _piecewise_structure(self) -> typing.Dict[str, typing.Any]:
+        """
+        The parts of the CO2 curve which do not depend on the fitted
+        parameters: the state change times of the model (and its constants),
+        and for both the state change times and the data times, the index of
+        the last state change, the occupancy and the index of the ventilation
+        value in effect.
+        """
+        n_values = len(self.ventilation_transition_times) - 1
+        # The state change times do not depend on the ventilation values.
+        reference_model = self.CO2_concentration_model(
+            exhalation_rate=1., ventilation_values=(1., ) * n_values)
+        change_times = np.array(reference_model.state_change_times(), dtype=float)
+
+        def value_index(transition_times, times, n_values):
+            # Vectorised equivalent of the index used by PiecewiseConstant.value.
+            indices = np.searchsorted(np.array(transition_times, dtype=float), times, side='left') - 1
+            return np.clip(indices, 0, n_values - 1)
+
+        def structure(times):
+            times = np.asarray(times, dtype=float)
+            last_change = value_index(change_times, times, len(change_times))
+            return {
+                'times': times,
+                'last_change': last_change,
+                'delta_time': times - change_times[last_change],
+                # As in IntPiecewiseConstant.value, nobody is present outside of the transition times.
+                'occupancy': np.array((0, ) + tuple(self.occupancy.values) + (0, ), dtype=float)[
+                    np.searchsorted(np.array(self.occupancy.transition_times, dtype=float), times, side='left')],
+                'ventilation_index': value_index(self.ventilation_transition_times, times, n_values),
+                'before_presence': times <= reference_model._first_presence_time(),
+            }
+
+        return {
+            'change_times': structure(change_times),
+            'data_times': structure(self.times),
+            'CO2_atmosphere_concentration': reference_model.CO2_atmosphere_concentration,
+            # The CO2 increase rate (ppm/h) per person and unit of exhalation rate.
+            'emission_rate_per_person': 1e6 * reference_model.CO2_fraction_exhaled / self.room.volume,
+        }
+
+    def _CO2_curve(self, exhalation_rate: float, ventilation_values: np.ndarray) -> typing.Tuple[np.ndarray, np.ndarray]:
+        """
+        The CO2 concentrations at the data times (as in :meth:`CO2_concentrations_from_params`,
+        but in a single vectorised pass) and their derivatives with respect
+        to the exhalation rate and the ventilation values.
+
+        Between two state changes the concentration above the atmospheric one
+        decays exponentially while growing with the emissions, and is
+        proportional to the exhalation rate: C = C_atm + exhalation_rate * G,
+        where G (and its derivatives) only depend on the ventilation values.
+        """
+        structure = self._piecewise_structure()
+        ventilation_values = np.asarray(ventilation_values, dtype=float)
+
+        def step(part, G_last, dG_last):
+            RR = ventilation_values[part['ventilation_index']]
+            dt = part['delta_time']
+            fac = np.exp(-RR * dt)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                # The integral of the decay over dt, and its derivative w.r.t. RR.
+                growth = np.where(RR == 0., dt, -np.expm1(-RR * dt) / RR)
+                dgrowth = np.where(RR == 0., -dt ** 2 / 2, (dt * fac - growth) / RR)
+            emission = structure['emission_rate_per_person'] * part['occupancy']
+            G = np.where(part['before_presence'], 0., G_last * fac + emission * growth)
+            dG = dG_last * fac[..., np.newaxis]
+            dRR = np.where(part['before_presence'], 0., -dt * fac * G_last + emission * dgrowth)
+            dG[np.arange(np.size(dt)), part['ventilation_index']] += dRR
+            dG[part['before_presence']] = 0.
+            return G, dG
+
+        # The state changes are evaluated in sequence, each from the previous one.
+        change_times = structure['change_times']
+        n_changes = len(change_times['times'])
+        G_changes = np.zeros(n_changes)
+        dG_changes = np.zeros((n_changes, len(ventilation_values)))
+        for k in range(1, n_changes):
+            part = {key: value[k:k+1] for key, value in change_times.items()}
+            G, dG = step(part, G_changes[k-1:k], dG_changes[k-1:k])
+            G_changes[k], dG_changes[k] = G[0], dG[0]
+
+        # All the data times are then evaluated at once, from their last state change.
+        data_times = structure['data_times']
+        G, dG = step(data_times, G_changes[data_times['last_change']], dG_changes[data_times['last_change']])
+
+        concentrations = structure['CO2_atmosphere_concentration'] + exhalation_rate * G
+        jacobian = np.concatenate([G[:, np.newaxis], exhalation_rate * dG], axis=1)
+        return concentrations, jacobian
+
+    def CO2_fit_params(
+            self,
+            initial_params: typing.Optional[typing.Sequence[float]] = None,
+            fitted_intervals: typing.Optional[typing.Sequence[int]] = None,
+    ) -> typing.Dict:
+        """
+        Fit the exhalation rate and the ventilation values to the CO2 data.
+
+        The fit starts from ``initial_params`` if given (the exhalation rate,
+        followed by the ventilation values, e.g. from a previous fit). If
+        ``fitted_intervals`` is given, only the exhalation rate and the
+        ventilation values of these intervals (indices) are fitted, the
+        other ventilation values being kept at their initial value.
+        """
         if len(self.times) != len(self.CO2_concentrations):
             raise ValueError('times and CO2_concentrations must have same length.')
 
@@ -1497,36 +1705,49 @@ class CO2DataModel:
             raise ValueError(
                 'times and CO2_concentrations must contain at last two elements')
 
-        def fun(x):
+        CO2_concentrations = np.asarray(self.CO2_concentrations, dtype=float)
+        params = np.ones(len(self.ventilation_transition_times))
+        if initial_params is not None:
+            params = np.array(initial_params, dtype=float)
+            if params.shape != (len(self.ventilation_transition_times), ):
+                raise ValueError('initial_params must contain the exhalation rate and one value per ventilation interval.')
+        # The indices, in the parameters, of the fitted ones.
+        fitted = np.arange(len(params))
+        if fitted_intervals is not None:
+            fitted = np.concatenate([[0], 1 + np.unique(np.asarray(fitted_intervals, dtype=int))])
+
+        # The residuals and the jacobian are requested for the same x in turn.
+        last_curve: typing.Dict[bytes, typing.Tuple[np.ndarray, np.ndarray]] = {}
+
+        def curve(x):
+            if x.tobytes() not in last_curve:
+                all_params = params.copy()
+                all_params[fitted] = x
+                last_curve.clear()
+                last_curve[x.tobytes()] = self._CO2_curve(all_params[0], all_params[1:])
+            return last_curve[x.tobytes()]
+
+        def residuals(x):
             '''
-            The objective function to be minimized, where x is an argument
-            containing the initial guess for the breathing rate (exhalation_rate) 
-            and ventilation values (ventilation_values).
+            The difference between the predicted and the known concentrations,
+            where x contains the breathing rate (exhalation_rate) and the
+            (fitted) ventilation values (ventilation_values).
             '''
-            exhalation_rate = x[0]
-            ventilation_values = tuple(x[1:])
-            CO2_concentration_model = self.CO2_concentration_model(
-                exhalation_rate=exhalation_rate,
-                ventilation_values=ventilation_values
-            )
-            the_concentrations = self.CO2_concentrations_from_params(CO2_concentration_model)
-            return np.sqrt(np.sum((np.array(self.CO2_concentrations) -
-                                   np.array(the_concentrations))**2))
+            return curve(x)[0] - CO2_concentrations
+
+        def jacobian(x):
+            return curve(x)[1][:, fitted]
+
+        from scipy.optimize import least_squares
+
         # The goal is to minimize the difference between the two different curves (known concentrations vs. predicted concentrations)
-        res_dict = minimize(fun=fun, x0=np.ones(len(self.ventilation_transition_times)), method='powell',
-                            bounds=[(0, None) for _ in range(len(self.ventilation_transition_times))],
-                            options={'xtol': 1e-3})
+        result = least_squares(fun=residuals, jac=jacobian, x0=params[fitted], bounds=(0, np.inf))
+        params[fitted] = result.x
 
         # Final prediction
-        exhalation_rate = res_dict['x'][0]
-        ventilation_values = res_dict['x'][1:] # In ACH
-
-        # Final CO2ConcentrationModel with obtained prediction
-        the_CO2_concentration_model = self.CO2_concentration_model(
-            exhalation_rate=exhalation_rate, 
-            ventilation_values=ventilation_values
-        )
-        the_predictive_CO2 = self.CO2_concentrations_from_params(the_CO2_concentration_model)
+        exhalation_rate = params[0]
+        ventilation_values = params[1:] # In ACH
+        the_predictive_CO2 = self._CO2_curve(exhalation_rate, ventilation_values)[0]
 
         # Ventilation in L/s
         flow_rates_l_s = [vent / 3600 * self.room.volume * 1000 for vent in ventilation_values] # 1m^3 = 1000L
@@ -1613,7 +1834,7 @@ class ExposureModel:
             if (isinstance(c_model.infected, InfectedPopulation) and not np.isscalar(c_model.infected.expiration.diameter)
                 # Check if the diameter-independent elements of the infectious_virus_removal_rate method are vectorised.
                 and not (
-                    all(np.isscalar(self.virus.decay_constant(self.room.humidity, self.room.inside_temp.value(time)) +
+                    all(_is_sample_independent(self.virus.decay_constant(self.room.humidity, self.room.inside_temp.value(time)) +
                     c_model.ventilation.air_exchange(self.room, time)) for time in c_model.state_change_times()))):
                 raise ValueError("If the diameter is an array, none of the ventilation parameters "
                                 "or virus decay constant can be arrays at the same time.")
@@ -1632,6 +1853,19 @@ class ExposureModel:
     def room(self):
         return self.concentration_model[0].room
 
+    @method_cache
+    def interval_transition_times(self) -> typing.FrozenSet[float]:
+        """
+        The transition times of all the :class:`Interval` objects of this
+        model (presence of the populations, short-range interactions and
+        ventilation), excluding temperature based changes.
+        """
+        return frozenset().union(
+            self.exposed.interval_transition_times(),
+            *(c_model.interval_transition_times() for c_model in self.concentration_model),
+            *(interaction.interval_transition_times() for interaction in self.short_range),
+        )
+
     @method_cache
     def population_state_change_times(self) -> typing.List[float]:
         """
@@ -1686,7 +1920,7 @@ class ExposureModel:
         of each ConcentrationModel over the particle diameters before adding together all the contributions from all 
         the ConcentrationModels.
         """
-        return sum([np.array(c_model.concentration(time)).mean() for c_model in self.concentration_model])
+        return sum([_sample_mean(c_model.concentration(time)) for c_model in self.concentration_model])
     
     def diluted_long_range_concentration(self, interaction, time: float) -> float:
         """
@@ -1706,7 +1940,7 @@ class ExposureModel:
         averaging here.
         """
         dilution_factor = interaction.dilution_factor()
-        return sum([np.mean(1/dilution_factor * c_model.concentration(time)) for c_model in self.concentration_model])
+        return sum([_sample_mean(1/dilution_factor * c_model.concentration(time)) for c_model in self.concentration_model])
     
     def concentration(self, time: float) -> float:
         """
@@ -1725,7 +1959,7 @@ class ExposureModel:
             # Verifies if the given time falls within a short-range interaction
             # NOTE: max one short-range interaction at a time, so the test should just yield true once (TODO check?)
             if start <= time <= stop:
-                concentration += np.mean(interaction.diluted_jet_concentration())
+                concentration += _sample_mean(interaction.diluted_jet_concentration())
                 concentration -= self.diluted_long_range_concentration(interaction, time)
         return concentration
 
@@ -1744,9 +1978,9 @@ class ExposureModel:
                 # to perform properly the Monte-Carlo integration over
                 # particle diameters (doing things in another order would
                 # lead to wrong results for the probability of infection).
-                dep_exposure_integrated = np.array(self._long_range_normed_exposure_between_bounds(c_model, time1, time2) *
+                dep_exposure_integrated = _sample_mean(self._long_range_normed_exposure_between_bounds(c_model, time1, time2) *
                                                     aerosols *
-                                                    fdep).mean()
+                                                    fdep)
             else:
                 # In the case of a single diameter or no diameter defined,
                 # one should not take any mean at this stage.
@@ -1761,26 +1995,20 @@ class ExposureModel:
 
         return deposited_exposure
 
-    def deposited_exposure_between_bounds(self, time1: float, time2: float) -> _VectorisedFloat:
+    @method_cache
+    def _short_range_deposited_exposure_rates(self) -> typing.Tuple[_VectorisedFloat, ...]:
         """
-        The number of virus per m^3 deposited on the respiratory tract
-        between any two times.
-
-        Considers a contribution between the short-range and long-range exposures:
-        It calculates the deposited exposure given a short-range interaction (if any).
-        Then, the deposited exposure given the long-range interactions is added to the
-        initial deposited exposure.
+        For each short-range interaction, the deposited exposure from the
+        jet per hour of interaction. These only depend on the (sampled)
+        interaction parameters, not on the time interval considered.
         """
-        deposited_exposure: _VectorisedFloat = 0.
-        for interaction in self.short_range:
-            if len(self.concentration_model) > 1:
-                raise NotImplementedError("yet to implement dynamic infected for SR interactions")
-
-            # Only adding the additional contribution from the short-range interaction
-            start, stop = interaction.extract_between_bounds(time1, time2)
-            short_range_jet_exposure = interaction._normed_jet_exposure_between_bounds(start, stop)
+        if self.short_range and len(self.concentration_model) > 1:
+            raise NotImplementedError("yet to implement dynamic infected for SR interactions")
 
-            dilution = interaction.dilution_factor()
+        rates = []
+        for interaction in self.short_range:
+            # Normed jet exposure during one hour (see ShortRangeModel._normed_jet_exposure_between_bounds).
+            short_range_jet_exposure = interaction._normed_jet_origin_concentration() * 10**6
 
             fdep = interaction.expiration.particle.fraction_deposited(evaporation_factor=1.0)
             diameter = interaction.expiration.particle.diameter
@@ -1792,8 +2020,8 @@ class ExposureModel:
                 # to perform properly the Monte-Carlo integration over
                 # particle diameters (doing things in another order would
                 # lead to wrong results for the probability of infection).
-                this_deposited_exposure = (np.array(short_range_jet_exposure
-                    * fdep).mean())
+                this_deposited_exposure = _sample_mean(short_range_jet_exposure
+                    * fdep)
             else:
                 # In the case of a single diameter or no diameter defined,
                 # one should not take any mean at this stage.
@@ -1802,23 +2030,59 @@ class ExposureModel:
             # Multiply by the (diameter-independent) inhalation rate
             _deposited_exposure = (this_deposited_exposure *
                                    interaction.activity.inhalation_rate
-                                   /dilution) 
-            
+                                   /interaction.dilution_factor())
+
             # Then we multiply by the emission rate without the BR contribution (and conversion factor),
             # and parameters of the vD equation (i.e. n_in).
-            deposited_exposure += _deposited_exposure*(
+            rates.append(_deposited_exposure*(
                 (self.concentration_model[0].infected.emission_rate_per_aerosol_per_person_when_present() / (
-                self.concentration_model[0].infected.activity.exhalation_rate * 10**6)) *                 
-                (1 - self.exposed.mask.inhale_efficiency()))
-            
-            deposited_exposure -= self.long_range_deposited_exposure_between_bounds(time1, time2)/dilution
+                self.concentration_model[0].infected.activity.exhalation_rate * 10**6)) *
+                (1 - self.exposed.mask.inhale_efficiency())))
+        return tuple(rates)
 
-            
-        # Long-range contributions from all infected populations (including the ones with SR interactions)
-        deposited_exposure += self.long_range_deposited_exposure_between_bounds(time1, time2)
+    def deposited_exposure_between_times(self, times: typing.Sequence[float]) -> typing.List[_VectorisedFloat]:
+        """
+        The number of virus per m^3 deposited on the respiratory tract
+        between each pair of consecutive times (as :meth:`deposited_exposure_between_bounds`).
+
+        The short-range contribution of each interaction is its (interval
+        independent) deposited exposure rate, times the vector of the
+        durations of the interaction within each interval. The long-range
+        contribution is computed once per interval, and the part of it
+        entrained in each short-range jet is subtracted.
+        """
+        rates = self._short_range_deposited_exposure_rates()
+        short_range_exposures = [
+            np.multiply.outer(interaction.overlap_durations(times), rate)
+            for interaction, rate in zip(self.short_range, rates)
+        ]
+        inverse_dilutions = [1/interaction.dilution_factor() for interaction in self.short_range]
+
+        deposited_exposures = []
+        for index, (time1, time2) in enumerate(zip(times[:-1], times[1:])):
+            # Long-range contributions from all infected populations (including the ones with SR interactions)
+            long_range_exposure = self.long_range_deposited_exposure_between_bounds(time1, time2)
+            deposited_exposure: _VectorisedFloat = 0.
+            for short_range_exposure, inverse_dilution in zip(short_range_exposures, inverse_dilutions):
+                # Only adding the additional contribution from the short-range interaction
+                deposited_exposure += short_range_exposure[index]
+                deposited_exposure -= long_range_exposure*inverse_dilution
+            deposited_exposures.append(deposited_exposure + long_range_exposure)
+        return deposited_exposures
 
-        return deposited_exposure
+    def deposited_exposure_between_bounds(self, time1: float, time2: float) -> _VectorisedFloat:
+        """
+        The number of virus per m^3 deposited on the respiratory tract
+        between any two times.
+
+        Considers a contribution between the short-range and long-range exposures:
+        It calculates the deposited exposure given a short-range interaction (if any).
+        Then, the deposited exposure given the long-range interactions is added to the
+        initial deposited exposure.
+        """
+        return self.deposited_exposure_between_times([time1, time2])[0]
 
+    @method_cache
     def deposited_exposure(self, short_range: bool = True) -> _VectorisedFloat:
         """
         The number of virus per m^3 deposited on the respiratory tract of a  
@@ -1831,12 +2095,11 @@ class ExposureModel:
         population_change_times = self.population_state_change_times()
         deposited_exposure = []
         if short_range:
-            for start, stop in zip(population_change_times[:-1], population_change_times[1:]):
-                deposited_exposure.append(self.deposited_exposure_between_bounds(start, stop))
+            deposited_exposure = self.deposited_exposure_between_times(population_change_times)
         else:
             for start, stop in zip(population_change_times[:-1], population_change_times[1:]):
                 deposited_exposure.append(self.long_range_deposited_exposure_between_bounds(start, stop))
-        return np.sum(deposited_exposure, axis=0) * self.repeats # type: ignore
+        return np.sum(np.broadcast_arrays(*deposited_exposure), axis=0, dtype=np.float64) * self.repeats # type: ignore
 
     @method_cache
     def individual_infection_probability(self, short_range: bool = True) -> _VectorisedFloat:
@@ -1852,6 +2115,16 @@ class ExposureModel:
         """
         # Viral dose (vD)
         vD = self.deposited_exposure(short_range)
+        return self.infection_probability_given_dose(vD)
+
+    def infection_probability_given_dose(self, deposited_exposure: _VectorisedFloat) -> _VectorisedFloat:
+        """
+        The probability of infection (in %) of a member of the exposed population
+        who received the given deposited dose (vD), e.g. a dose rescaled from
+        deposited_exposure() for an alternative scenario.
+        """
+        # The exponent is evaluated in float64, even with float32 samples.
+        vD = np.asarray(deposited_exposure, dtype=np.float64)
 
         # oneoverln2 multiplied by ID_50 corresponds to ID_63.
         infectious_dose = oneoverln2 * self.virus.infectious_dose
@@ -1881,7 +2154,7 @@ class ExposureModel:
                 exposure_model = replace_concentration_model_properties(
                     self, {'infected.number': num_infected}
                 )
-                prob_ind = exposure_model.individual_infection_probability().mean() / 100
+                prob_ind = _sample_mean(exposure_model.individual_infection_probability()) / 100
                 n = total_people - num_infected
                 # By means of the total probability rule
                 prob_at_least_one_infected = 1 - (1 - prob_ind)**n
@@ -1953,6 +2226,16 @@ class ExposureModelGroup:
                     model.concentration_model[i].infected.presence != first_concentration_model.infected.presence):
                     raise ValueError("All ExposureModels must have the same infected number and presence in each ConcentrationModel.")
 
+    @method_cache
+    def interval_transition_times(self) -> typing.FrozenSet[float]:
+        """
+        The transition times of all the :class:`Interval` objects of the
+        exposure models of this group.
+        """
+        return frozenset().union(*(
+            model.interval_transition_times() for model in self.exposure_models
+        ))
+
     @method_cache
     def _deposited_exposure_list(self) -> typing.List[_VectorisedFloat]:
         """
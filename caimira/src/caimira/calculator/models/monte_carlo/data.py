@@ -386,7 +386,7 @@ def expiration_distribution(
             BLOmodel(data_registry, BLO_factors).distribution(dscan),
             kernel_bandwidth=0.1,
         ),
-        cn=BLOmodel(data_registry, BLO_factors).integrate(d_min, d_max),
+        cn=float(BLOmodel(data_registry, BLO_factors).integrate(d_min, d_max)),
         name=exp_type,
     )
 
@@ -3,6 +3,9 @@ import dataclasses
 import sys
 import typing
 
+import numpy as np
+import numpy.typing
+
 from caimira.calculator.models import models
 
 from .sampleable import SampleableDistribution, _VectorisedFloatOrSampleable
@@ -22,15 +25,16 @@ class MCModelBase(typing.Generic[_ModelType]):
     _base_cls: typing.Type[dataclass_instance]
 
     @classmethod
-    def _to_vectorized_form(cls, item, size):
+    def _to_vectorized_form(cls, item, size, dtype=None):
         if isinstance(item, SampleableDistribution):
-            return item.generate_samples(size)
+            samples = item.generate_samples(size)
+            return samples if dtype is None else np.asarray(samples, dtype=dtype)
         elif isinstance(item, MCModelBase):
             # Recurse into other MCModelBase instances by calling their
             # build_model method.
-            return item.build_model(size)
+            return item.build_model(size, dtype)
         elif isinstance(item, tuple):
-            return tuple(cls._to_vectorized_form(sub, size) for sub in item)
+            return tuple(cls._to_vectorized_form(sub, size, dtype) for sub in item)
         elif isinstance(item, list):
             if any(isinstance(e, MCModelBase) for e in item):
                 raise TypeError(
@@ -40,16 +44,18 @@ class MCModelBase(typing.Generic[_ModelType]):
         else:
             return item
 
-    def build_model(self, size: int) -> _ModelType:
+    def build_model(self, size: int, dtype: typing.Optional[np.typing.DTypeLike] = None) -> _ModelType:
         """
         Turn this MCModelBase subclass into a caimira.model Model instance
         from which you can then run the model.
 
+        If dtype is given (e.g. np.float32), the samples are converted to it.
+
         """
         kwargs = {}
         for field in dataclasses.fields(self._base_cls):
             attr = getattr(self, field.name)
-            kwargs[field.name] = self._to_vectorized_form(attr, size)
+            kwargs[field.name] = self._to_vectorized_form(attr, size, dtype)
         return self._base_cls(**kwargs)
 
 
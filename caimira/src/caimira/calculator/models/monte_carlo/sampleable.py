@@ -1,7 +1,6 @@
 import typing
 
 import numpy as np
-from sklearn.neighbors import KernelDensity
 
 from caimira.calculator.models import models
 
@@ -126,6 +125,8 @@ class CustomKernel(SampleableDistribution):
         self.kernel_bandwidth = kernel_bandwidth
 
     def generate_samples(self, size: int) -> float_array_size_n:
+        from sklearn.neighbors import KernelDensity
+
         kde_model = KernelDensity(kernel='gaussian',
                                   bandwidth=self.kernel_bandwidth)
         kde_model.fit(self.variable.reshape(-1, 1),
@@ -150,6 +151,8 @@ class LogCustomKernel(SampleableDistribution):
         self.kernel_bandwidth = kernel_bandwidth
 
     def generate_samples(self, size: int) -> float_array_size_n:
+        from sklearn.neighbors import KernelDensity
+
         kde_model = KernelDensity(kernel='gaussian',
                                   bandwidth=self.kernel_bandwidth)
         kde_model.fit(self.log_variable.reshape(-1, 1),
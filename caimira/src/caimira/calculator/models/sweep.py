@@ -0,0 +1,87 @@
+# This module is part of CAiMIRA. Please see the repository at
+# https://gitlab.cern.ch/caimira/caimira for details of the license and terms of use.
+"""
+Parameter sweeps over a leading scenario axis.
+
+The models of :mod:`caimira.calculator.models.models` are vectorised over
+the Monte-Carlo samples: a parameter can be an array of N samples. A sweep
+adds a second, leading, axis which carries S scenario variants of one or
+more parameters (e.g. 50 values of ``ventilation.air_exch``). The swept
+values are stored as (S, 1) columns so that, by broadcasting, every model
+quantity becomes an (S, N) array - a whole sensitivity analysis is thus one
+vectorised evaluation instead of S model builds.
+
+For example::
+
+    >>> swept = sweep(exposure_model, {
+    ...     'concentration_model.ventilation.air_exch': np.linspace(0.25, 10, 50),
+    ... })
+    >>> scenario_mean(swept.individual_infection_probability()).shape
+    (50,)
+
+Monte-Carlo models must be built (``build_model``) before being swept.
+
+"""
+import itertools
+import typing
+
+import numpy as np
+
+from .dataclass_utils import nested_replace
+from . import models
+
+
+def scenario_axis(values: typing.Sequence[float]) -> np.ndarray:
+    """
+    Shape the given scenario values as an (S, 1) column, which broadcasts
+    against the (N,) Monte-Carlo samples of the model.
+    """
+    return np.asarray(values, dtype=np.float64).reshape(-1, 1)
+
+
+def sweep(model, parameters: typing.Dict[str, typing.Sequence[float]]):
+    """
+    Return a copy of the model where each of the given (dotted) parameters
+    takes one value per scenario. All the parameters must have the same
+    number of values, the i-th scenario being made of the i-th value of
+    each of them (see :func:`sweep_grid` for a full factorial design).
+
+    When sweeping an :class:`ExposureModel`, names starting with
+    ``concentration_model.`` are applied to each of its concentration models.
+
+    """
+    columns = {name: scenario_axis(values) for name, values in parameters.items()}
+    if len({column.shape for column in columns.values()}) > 1:
+        raise ValueError("All the swept parameters must have the same number of scenarios.")
+
+    cm_prefix = 'concentration_model.'
+    if isinstance(model, models.ExposureModel):
+        cm_columns = {name[len(cm_prefix):]: column for name, column in columns.items()
+                      if name.startswith(cm_prefix)}
+        columns = {name: column for name, column in columns.items()
+                   if not name.startswith(cm_prefix)}
+        if cm_columns:
+            model = nested_replace(model, {
+                'concentration_model': tuple(
+                    nested_replace(c_model, cm_columns)
+                    for c_model in model.concentration_model
+                )
+            })
+    return nested_replace(model, columns)
+
+
+def sweep_grid(model, parameters: typing.Dict[str, typing.Sequence[float]]):
+    """
+    Sweep the full factorial grid of the given parameters. The scenarios
+    are ordered as :func:`itertools.product` of the parameter values (the
+    last parameter varying fastest).
+    """
+    grid = np.array(list(itertools.product(*parameters.values())), dtype=np.float64)
+    return sweep(model, dict(zip(parameters, grid.T)))
+
+
+def scenario_mean(values: models._VectorisedFloat) -> np.ndarray:
+    """
+    Monte-Carlo average of a swept quantity, giving one value per scenario.
+    """
+    return np.asarray(np.mean(values, axis=-1)).reshape(-1)
@@ -1,4 +1,8 @@
 import functools
+import typing
+import weakref
+
+import numpy as np
 
 
 def method_cache(fn):
@@ -25,3 +29,40 @@ def method_cache(fn):
             cache[cache_key] = fn(self, *args, **kwargs)
         return cache[cache_key]
     return cached_method
+
+
+#: A marker, in the identity_cache keys, of the identity of an array argument.
+_ARRAY_ID = object()
+
+
+def identity_cache(fn):
+    """
+    A decorator caching the results of a function of (large) arrays, such
+    as the sampled particle diameters, keyed on the identity of the array
+    arguments rather than on their values: hashing the arrays would cost
+    as much as the computation itself. The other arguments must be
+    hashable. Calls without any (non 0-d) array argument are not cached.
+
+    An entry is dropped as soon as one of its arrays is garbage collected,
+    so that its id cannot be reused by another array. As the models are
+    immutable, the arrays are never modified in place.
+
+    """
+    cache: typing.Dict[tuple, typing.Any] = {}
+
+    @functools.wraps(fn)
+    def cached_function(*args):
+        arrays = [arg for arg in args if isinstance(arg, np.ndarray)]
+        if not any(array.ndim for array in arrays):
+            return fn(*args)
+        cache_key = tuple(
+            (_ARRAY_ID, id(arg)) if isinstance(arg, np.ndarray) else arg
+            for arg in args
+        )
+        if cache_key not in cache:
+            cache[cache_key] = fn(*args)
+            for array in arrays:
+                weakref.finalize(array, cache.pop, cache_key, None)
+        return cache[cache_key]
+    cached_function.cache = cache  # type: ignore
+    return cached_function
@@ -4,11 +4,15 @@ from caimira.calculator.models.models import CO2DataModel
 
 def build_initial_plot(
         form: CO2FormData,
+        render: bool = True,
+        plot_format: str = 'png',
 ) -> dict:
     '''
     Initial plot with the suggested ventilation state changes. 
     This method receives the form input and returns the CO2
     plot with the respective transition times.
+    If ``render`` is False, only the plot data is returned
+    (``CO2_plot_img`` is None), for client side charting.
     '''
     CO2model: CO2DataModel = form.build_CO2_data_model()
 
@@ -23,7 +27,9 @@ def build_initial_plot(
 
     vent_plot_img, vent_plot_data = form.generate_ventilation_plot(
         ventilation_transition_times=ventilation_transition_times,
-        occupancy_transition_times=occupancy_transition_times
+        occupancy_transition_times=occupancy_transition_times,
+        render=render,
+        plot_format=plot_format,
     )
 
     context = {
@@ -37,11 +43,15 @@ def build_initial_plot(
 
 def build_fitting_results(
         form: CO2FormData,
+        render: bool = True,
+        plot_format: str = 'png',
 ) -> dict:
     '''
     Final fitting results with the respective predictive CO2. 
     This method receives the form input and returns the fitting results
     along with the CO2 plot with the predictive CO2.
+    If ``render`` is False, only the plot data is returned
+    (``CO2_plot_img`` is None), for client side charting.
     '''
     CO2model: CO2DataModel = form.build_CO2_data_model()
 
@@ -54,7 +64,9 @@ def build_fitting_results(
     context = dict(CO2model.CO2_fit_params())
 
     vent_plot_img, vent_plot_data = form.generate_ventilation_plot(ventilation_transition_times=ventilation_transition_times[:-1],
-                                        predictive_CO2=context['predictive_CO2'])
+                                        predictive_CO2=context['predictive_CO2'],
+                                        render=render,
+                                        plot_format=plot_format)
 
     # Add the transition times and CO2 plot to the results.
     context['transition_times'] = ventilation_transition_times
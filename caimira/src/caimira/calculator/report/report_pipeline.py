@@ -0,0 +1,110 @@
+"""
+A minimal dependency graph (DAG) of report stages.
+
+Each stage is a function of the results of the stages it depends on.
+Stages whose dependencies are satisfied run concurrently on the given
+executor, and the time taken by each stage is recorded. Disabled stages,
+and the stages depending on them, are skipped entirely.
+
+"""
+import concurrent.futures
+import dataclasses
+import time
+import typing
+
+
+@dataclasses.dataclass(frozen=True)
+class ReportStage:
+    #: The name of the stage, also the keyword argument under which its
+    #: result is passed to the dependent stages.
+    name: str
+
+    #: Called with the results of the dependencies as keyword arguments.
+    function: typing.Callable[..., typing.Any]
+
+    #: The names of the stages which must complete before this one.
+    dependencies: typing.Tuple[str, ...] = ()
+
+    #: Whether the stage was requested. If not, it is skipped.
+    enabled: bool = True
+
+
+@dataclasses.dataclass
+class PipelineResult:
+    #: The result of each stage which was run, by name.
+    results: typing.Dict[str, typing.Any]
+
+    #: The time taken by each stage which was run, in seconds.
+    timings: typing.Dict[str, float]
+
+    #: The names of the stages which were skipped.
+    skipped: typing.Tuple[str, ...]
+
+
+def _timed(stage: ReportStage, kwargs: typing.Dict[str, typing.Any]) -> typing.Tuple[typing.Any, float]:
+    start = time.perf_counter()
+    result = stage.function(**kwargs)
+    return result, time.perf_counter() - start
+
+
+class ReportPipeline:
+    def __init__(self, stages: typing.Iterable[ReportStage]):
+        self.stages: typing.Dict[str, ReportStage] = {}
+        for stage in stages:
+            if stage.name in self.stages:
+                raise ValueError(f"Duplicate report stage {stage.name!r}")
+            unknown = [dep for dep in stage.dependencies if dep not in self.stages]
+            if unknown:
+                # Requiring the dependencies to be declared first excludes cycles.
+                raise ValueError(
+                    f"Report stage {stage.name!r} depends on undeclared stage(s) {unknown}")
+            self.stages[stage.name] = stage
+
+    def active_stages(self) -> typing.List[str]:
+        """
+        The names of the stages which will be run: the enabled stages
+        whose dependencies are all active.
+        """
+        active: typing.List[str] = []
+        for name, stage in self.stages.items():
+            if stage.enabled and all(dep in active for dep in stage.dependencies):
+                active.append(name)
+        return active
+
+    def run(
+            self,
+            executor: concurrent.futures.Executor,
+            on_stage_complete: typing.Optional[typing.Callable[[str, typing.Any], None]] = None,
+    ) -> PipelineResult:
+        """
+        Run the active stages on the given executor, each as soon as its
+        dependencies have completed. If given, on_stage_complete is called
+        (in the calling thread) with the name and result of each stage, in
+        order of completion. The first exception raised by a stage is
+        propagated, once the running stages have completed.
+        """
+        pending = self.active_stages()
+        skipped = tuple(name for name in self.stages if name not in pending)
+        results: typing.Dict[str, typing.Any] = {}
+        timings: typing.Dict[str, float] = {}
+        running: typing.Dict[concurrent.futures.Future, str] = {}
+
+        while pending or running:
+            for name in list(pending):
+                stage = self.stages[name]
+                if all(dep in results for dep in stage.dependencies):
+                    pending.remove(name)
+                    kwargs = {dep: results[dep] for dep in stage.dependencies}
+                    running[executor.submit(_timed, stage, kwargs)] = name
+
+            done, _ = concurrent.futures.wait(running, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                if future.exception() is not None:
+                    concurrent.futures.wait(running)
+                    raise future.exception()  # type: ignore
+                results[name], timings[name] = future.result()
+                if on_stage_complete is not None:
+                    on_stage_complete(name, results[name])
+
+        return PipelineResult(results=results, timings=timings, skipped=skipped)
@@ -2,10 +2,8 @@ import concurrent.futures
 import base64
 import dataclasses
 import io
-import copy
 import typing
 import numpy as np
-import matplotlib.pyplot as plt
 from collections import defaultdict
 
 from caimira.calculator.models import models, dataclass_utils, profiler, monte_carlo as mc
@@ -39,21 +37,56 @@ def fill_big_gaps(array, gap_size):
     All values in the given array are preserved, even if they are within the ``gap_size`` of one another.
 
     >>> fill_big_gaps([1, 2, 4], gap_size=0.75)
-    [1, 1.75, 2, 2.75, 3.5, 4]
+    [1.0, 1.75, 2.0, 2.75, 3.5, 4.0]
 
     """
-    result = []
     if len(array) == 0:
         raise ValueError("Input array must be len > 0")
 
-    last_value = array[0]
-    for value in array:
-        while value - last_value > gap_size + 1e-15:
-            last_value = last_value + gap_size
-            result.append(last_value)
-        result.append(value)
-        last_value = value
-    return result
+    values = np.asarray(array, dtype=np.float64)
+    # Number of values to insert in each gap (with some float tolerance on the gap size).
+    n_inserts = np.maximum(np.ceil((np.diff(values) - 1e-15) / gap_size) - 1, 0).astype(int)
+    # Position of each inserted value within its own gap: 1, 2, ..., n_inserts.
+    steps = np.arange(1, n_inserts.sum() + 1) - np.repeat(np.cumsum(n_inserts) - n_inserts, n_inserts)
+    inserted = np.repeat(values[:-1], n_inserts) + steps * gap_size
+    return np.insert(values, np.repeat(np.arange(1, len(values)), n_inserts), inserted).tolist()
+
+
+def refine_by_curvature(times: typing.Sequence[float], values: typing.Sequence[float],
+                        n_pts: int, fixed_times: typing.Collection[float] = ()) -> typing.List[float]:
+    """
+    Insert points into the given sorted ``times`` so that there are about
+    ``n_pts`` in total, with the new points placed where the piecewise linear
+    interpolation of ``values`` (sampled at ``times``) is the least accurate.
+
+    Each interval receives a number of points proportional to its width times
+    the square root of the local curvature, which equidistributes the
+    interpolation error. ``fixed_times`` are points where the curve is known to
+    have a kink (e.g. state change times): no curvature is estimated there.
+
+    """
+    t = np.asarray(times, dtype=np.float64)
+    y = np.asarray(values, dtype=np.float64)
+    budget = n_pts - len(t)
+    if budget <= 0 or len(t) < 3:
+        return t.tolist()
+
+    widths = np.diff(t)
+    slopes = np.diff(y) / widths
+    curvature = np.zeros(len(t))
+    curvature[1:-1] = np.abs(2 * np.diff(slopes) / (widths[1:] + widths[:-1]))
+    curvature[np.isin(t, list(fixed_times))] = 0.
+
+    weights = widths * np.sqrt(np.maximum(curvature[:-1], curvature[1:]))
+    if weights.sum() == 0.:
+        return t.tolist()
+    n_inserts = np.floor(budget * weights / weights.sum()).astype(int)
+
+    # The k-th of the n points inserted in [t_i, t_i+1] is at t_i + k * width_i / (n + 1).
+    steps = np.arange(1, n_inserts.sum() + 1) - np.repeat(np.cumsum(n_inserts) - n_inserts, n_inserts)
+    inserted = (np.repeat(t[:-1], n_inserts) +
+                steps * np.repeat(widths / (n_inserts + 1), n_inserts))
+    return np.insert(t, np.repeat(np.arange(1, len(t)), n_inserts), inserted).tolist()
 
 
 def non_temp_transition_times(model: typing.Union[models.ExposureModelGroup, models.ExposureModel]):
@@ -61,25 +94,9 @@ def non_temp_transition_times(model: typing.Union[models.ExposureModelGroup, mod
     Return the non-temperature (and PiecewiseConstant) based transition times.
 
     """
-    def walk_model(model, name=""):
-        # Extend walk_dataclass to handle lists of dataclasses
-        # (e.g. in MultipleVentilation).
-        for name, obj in dataclass_utils.walk_dataclass(model, name=name):
-            if name.endswith('.ventilations') and isinstance(obj, (list, tuple)):
-                for i, item in enumerate(obj):
-                    fq_name_i = f'{name}[{i}]'
-                    yield fq_name_i, item
-                    if dataclasses.is_dataclass(item):
-                        yield from dataclass_utils.walk_dataclass(item, name=fq_name_i)
-            else:
-                yield name, obj
-
     t_start, t_end = model_start_end(model)
 
-    change_times = {t_start, t_end}
-    for _, obj in walk_model(model, name="exposure"):
-        if isinstance(obj, models.Interval):
-            change_times |= obj.transition_times()
+    change_times = {t_start, t_end} | model.interval_transition_times()
 
     # Only choose times that are in the range of the model (removes things
     # such as PeriodicIntervals, which extend beyond the model itself).
@@ -87,7 +104,8 @@ def non_temp_transition_times(model: typing.Union[models.ExposureModelGroup, mod
 
 
 def interesting_times(model: typing.Union[models.ExposureModelGroup, models.ExposureModel], 
-                      approx_n_pts: typing.Optional[int] = None) -> typing.List[float]:
+                      approx_n_pts: typing.Optional[int] = None,
+                      adaptive: bool = False) -> typing.List[float]:
     """
     Pick approximately ``approx_n_pts`` time points which are interesting for the
     given model. If not provided by argument, ``approx_n_pts`` is set to be 15 times
@@ -97,54 +115,78 @@ def interesting_times(model: typing.Union[models.ExposureModelGroup, models.Expo
     outside temperature), and the times are then subsequently expanded to ensure
     that the step size is at most ``(t_end - t_start) / approx_n_pts``.
 
+    If ``adaptive`` is True, only a third of the points are spread uniformly.
+    The remaining ones are placed according to the local curvature of the
+    concentration (see :func:`refine_by_curvature`), i.e. mostly where it
+    changes fast rather than where it is flat.
+
     """
     times = non_temp_transition_times(model)
     sim_duration = max(times) - min(times)
     if not approx_n_pts:
         approx_n_pts = sim_duration * 15
 
-    # Expand the times list to ensure that we have a maximum gap size between
-    # the key times.
-    nice_times = fill_big_gaps(times, gap_size=(sim_duration) / approx_n_pts)
-    return nice_times
+    if not adaptive:
+        # Expand the times list to ensure that we have a maximum gap size between
+        # the key times.
+        nice_times = fill_big_gaps(times, gap_size=(sim_duration) / approx_n_pts)
+        return nice_times
+
+    coarse_times = fill_big_gaps(times, gap_size=3 * sim_duration / approx_n_pts)
+    exposure_models = (model.exposure_models if isinstance(model, models.ExposureModelGroup)
+                       else (model, ))
+    concentrations = [
+        sum(np.mean(exposure_model.concentration(time)) for exposure_model in exposure_models)
+        for time in coarse_times
+    ]
+    return refine_by_curvature(coarse_times, concentrations, int(approx_n_pts), fixed_times=times)
 
 
-def _concentrations_with_sr_breathing(form: VirusFormData, model: models.ExposureModel, 
-                                      time: float, fn_name: typing.Optional[str] = None):
+def _concentrations_with_sr_breathing(form: VirusFormData, model: models.ExposureModel, time: float) -> models._VectorisedFloat:
     """
     Returns the zoomed viral concentrations.
     """
     for index, (start, stop) in enumerate([interaction.presence.boundaries()[0] for interaction in model.short_range]):
         if start <= time <= stop and form.short_range_interactions[model.identifier][index]['expiration'] == 'Breathing':
-            return model.concentration(float(time)), fn_name
-    return model.long_range_concentration(float(time)), fn_name
-
-
-def _calculate_deposited_exposure(model: models.ExposureModel, 
-                                  time1: float, time2: float, fn_name: typing.Optional[str] = None):
-    return np.array(model.deposited_exposure_between_bounds(float(time1), float(time2))).mean(), fn_name
-
+            return model.concentration(float(time))
+    return model.long_range_concentration(float(time))
 
-def _calculate_long_range_deposited_exposure(model: models.ExposureModel, 
-                                             time1: float, time2: float, fn_name: typing.Optional[str] = None):
-    return np.array(model.long_range_deposited_exposure_between_bounds(float(time1), float(time2))).mean(), fn_name
 
-
-def _calculate_concentration(model: models.ExposureModel, 
-                             time: float, fn_name: typing.Optional[str] = None):
+def _group_time_series(form: VirusFormData, model: models.ExposureModel,
+                       times: typing.Sequence[float]) -> typing.Dict[str, typing.List[float]]:
     """
-    Returns the concentration of viruses emitted by
-    the infected population. Short- and long-range included.
+    Evaluates the time dependent results of a single exposed group at all
+    the given times. The times are evaluated in order, in a single task, so
+    that each step reuses the state cached on the model by the previous ones.
     """
-    return model.concentration(float(time)), fn_name
-
-
-def _calculate_co2_concentration(CO2_model: models.CO2ConcentrationModel, time: float, fn_name: typing.Optional[str] = None):
+    intervals = [(float(time1), float(time2)) for time1, time2 in zip(times[:-1], times[1:])]
+    results = {
+        # Virus concentration (short- and long-range included).
+        "concentrations": [model.concentration(float(time)) for time in times],
+        "cumulative_doses": list(np.cumsum([
+            np.array(deposited_exposure).mean()
+            for deposited_exposure in model.deposited_exposure_between_times([float(time) for time in times])
+        ])),
+    }
+    # Calculate long_range results when short-range interactions are defined
+    if model.short_range != ():
+        results["concentrations_zoomed"] = [
+            _concentrations_with_sr_breathing(form, model, float(time)) for time in times
+        ]
+        results["long_range_cumulative_doses"] = list(np.cumsum([
+            np.array(model.long_range_deposited_exposure_between_bounds(time1, time2)).mean()
+            for time1, time2 in intervals
+        ]))
+    return results
+
+
+def _co2_time_series(CO2_model: models.CO2ConcentrationModel,
+                     times: typing.Sequence[float]) -> typing.List[float]:
     """
     Returns the CO2 concentration emitted by all
-    the present population.
+    the present population, at all the given times.
     """
-    return np.array(CO2_model.concentration(float(time))).mean(), fn_name
+    return [np.array(CO2_model.concentration(float(time))).mean() for time in times]
 
 
 def merge_intervals(intervals: typing.List[typing.List[float]]) -> typing.List[typing.List[float]]:
@@ -180,9 +222,28 @@ def merge_short_range_interactions(all_exposed_groups: typing.Dict[str, typing.A
     ]
 
 
-def group_results(form: VirusFormData, model_group: models.ExposureModelGroup) -> typing.Dict[str, typing.Any]:
+def conditional_probability_results(form: VirusFormData, model: models.ExposureModel) -> typing.Dict[str, typing.Any]:
+    """
+    Generates the conditional probability data and plot of a single group,
+    if requested in the form and applicable to its viral load distribution.
+    """
+    if not (form.conditional_probability_viral_loads and
+            model.data_registry.virological_data['virus_distributions'][form.virus_type]['viral_load_in_sputum'] == ViralLoads.COVID_OVERALL.value):  # type: ignore
+        return {}
+    prob = model.individual_infection_probability()
+    conditional_probability_data = manufacture_conditional_probability_data(model, prob)
+    return {
+        "conditional_probability_data": conditional_probability_data,
+        "uncertainties_plot_src": img2base64(_figure2bytes(uncertainties_plot(prob, conditional_probability_data)))
+    }
+
+
+def group_results(form: VirusFormData, model_group: models.ExposureModelGroup,
+                  include_conditional_probability: bool = True) -> typing.Dict[str, typing.Any]:
     """
     Generates the output per group of exposure models.
+    The conditional probability results can be left out, to be computed
+    separately with conditional_probability_results.
     """
     groups: dict = defaultdict(dict)
     for single_group in model_group.exposure_models:
@@ -205,13 +266,9 @@ def group_results(form: VirusFormData, model_group: models.ExposureModelGroup) -
         }
 
         # In case of conditional probability plot
-        if (form.conditional_probability_viral_loads and
-                single_group.data_registry.virological_data['virus_distributions'][form.virus_type]['viral_load_in_sputum'] == ViralLoads.COVID_OVERALL.value):  # type: ignore
-            conditional_probability_data = manufacture_conditional_probability_data(single_group, prob)
-            groups[single_group.identifier].update({
-                "conditional_probability_data": conditional_probability_data,
-                "uncertainties_plot_src": img2base64(_figure2bytes(uncertainties_plot(prob, conditional_probability_data)))
-            })
+        if include_conditional_probability:
+            groups[single_group.identifier].update(
+                conditional_probability_results(form, single_group))
 
         # Probabilistic exposure
         if form.exposure_option == "p_probabilistic_exposure":
@@ -245,77 +302,36 @@ def group_results(form: VirusFormData, model_group: models.ExposureModelGroup) -
 
 @profiler.profile
 def calculate_report_data(form: VirusFormData, 
-                          executor_factory: typing.Callable[[], concurrent.futures.Executor]) -> typing.Dict[str, typing.Any]:
+                          executor_factory: typing.Callable[[], concurrent.futures.Executor],
+                          model_group: typing.Optional[models.ExposureModelGroup] = None,
+                          include_conditional_probability: bool = True) -> typing.Dict[str, typing.Any]:
     """
-    Generates the simulation output data.
+    Generates the simulation output data, for the given model_group
+    (built from the form if not given).
     """
-    model_group: models.ExposureModelGroup = form.build_model()
-    results_per_group: typing.Dict[str, typing.Any] = group_results(form, model_group)
+    if model_group is None:
+        model_group = form.build_model()
+    results_per_group: typing.Dict[str, typing.Any] = group_results(
+        form, model_group, include_conditional_probability)
     times = interesting_times(model_group)
     
     # CO2 concentration 
     CO2_model: models.CO2ConcentrationModel = form.build_CO2_model()
 
-    # Compute deposited exposures and virus/CO2 concentrations in parallel to increase performance
-    deposited_exposures = defaultdict(list)
-    long_range_deposited_exposures = defaultdict(list)
-    concentrations = defaultdict(list)
-    concentrations_zoomed = defaultdict(list)
-    CO2_concentrations = []
-
-    tasks = []
+    # Compute deposited exposures and virus/CO2 concentrations in parallel
+    # to increase performance: one task per exposed group, and one for CO2.
     with executor_factory() as executor:
-        for time1, time2 in zip(times[:-1], times[1:]):
-            for single_group in model_group.exposure_models:
-                tasks.append(executor.submit(
-                    _calculate_deposited_exposure, single_group, time1, time2, fn_name=f"{single_group.identifier}:de"))
-                # virus and co2 concentration: takes each time as param, not the interval
-                tasks.append(executor.submit(
-                    _calculate_concentration, single_group, time1, fn_name=f"{single_group.identifier}:cn"))
-                if single_group.short_range != ():
-                    tasks.append(executor.submit(
-                        _calculate_long_range_deposited_exposure, single_group, time1, time2, fn_name=f"{single_group.identifier}:de_lr"))
-                    tasks.append(executor.submit(
-                        _concentrations_with_sr_breathing, form, single_group, time1, fn_name=f"{single_group.identifier}:cn_zoomed")) 
-            
-            tasks.append(executor.submit(
-                _calculate_co2_concentration, CO2_model, time1, fn_name="co2"))
-        
-        # virus and co2 concentration: calculate the last time too
-        for single_model in model_group.exposure_models:
-            tasks.append(executor.submit(_calculate_concentration, 
-                        single_model, times[-1], fn_name=f"{single_model.identifier}:cn"))
-            if single_group.short_range != ():
-                tasks.append(executor.submit(_concentrations_with_sr_breathing, 
-                                             form, single_model, times[-1], fn_name=f"{single_model.identifier}:cn_zoomed"))
-                
-        tasks.append(executor.submit(_calculate_co2_concentration,
-                    CO2_model, times[-1], fn_name="co2"))
-    
-    for task in tasks:
-        result, fn_name = task.result()
-        if ":" in fn_name:
-            if fn_name.split(":")[1] == "de":
-                deposited_exposures[fn_name.split(':')[0]].append(result)
-            elif fn_name.split(":")[1] == "de_lr":
-                long_range_deposited_exposures[fn_name.split(':')[0]].append(result)
-            elif fn_name.split(":")[1] == "cn":
-                concentrations[fn_name.split(':')[0]].append(result)
-            elif fn_name.split(":")[1] == "cn_zoomed":
-                concentrations_zoomed[fn_name.split(':')[0]].append(result)
-        else:
-            if fn_name == "co2":
-                CO2_concentrations.append(result)
+        group_tasks = {
+            single_group.identifier: executor.submit(_group_time_series, form, single_group, times)
+            for single_group in model_group.exposure_models
+        }
+        CO2_task = executor.submit(_co2_time_series, CO2_model, times)
 
     # Update results per group
-    for single_group in model_group.exposure_models:
-        results_per_group[single_group.identifier]["concentrations"] = concentrations[single_group.identifier]
-        results_per_group[single_group.identifier]["cumulative_doses"] = list(np.cumsum(deposited_exposures[single_group.identifier]))
-        # Calculate long_range results when short-range interactions are defined
-        if single_group.short_range != ():
-            results_per_group[single_group.identifier]["concentrations_zoomed"] = concentrations_zoomed[single_group.identifier]
-            results_per_group[single_group.identifier]["long_range_cumulative_doses"] = list(np.cumsum(long_range_deposited_exposures[single_group.identifier]))
-    
+    for identifier, task in group_tasks.items():
+        results_per_group[identifier].update(task.result())
+    CO2_concentrations = CO2_task.result()
+
     return {
         # General results across all groups
         "model": model_group.exposure_models[0],
@@ -332,37 +348,57 @@ def conditional_prob_inf_given_vl_dist(
     specific_vl: models._VectorisedFloat,
     step: models._VectorisedFloat
 ):
+    """
+    Mean and 5th/95th percentiles of the probability of infection, for the
+    samples whose (log10) viral load ``specific_vl`` lies within ``step/2``
+    (exclusive) of each of the given ``viral_loads``. Bins without any
+    sample yield NaN.
+
+    The samples are sorted by viral load once, so that each bin is a
+    contiguous slice: the means come from cumulative sums and only the
+    percentiles are computed per bin, on the bin's own samples.
+    """
+    viral_loads = np.asarray(viral_loads)
+    order = np.argsort(specific_vl, kind='stable')
+    sorted_vl = np.asarray(specific_vl)[order]
+    sorted_prob = np.asarray(individual_infection_probability)[order]
 
-    pi_means = []
-    lower_percentiles = []
-    upper_percentiles = []
+    # Open intervals: vl_log - step/2 < specific_vl < vl_log + step/2
+    starts = np.searchsorted(sorted_vl, viral_loads - step/2, side='right')
+    stops = np.searchsorted(sorted_vl, viral_loads + step/2, side='left')
+    counts = np.maximum(stops - starts, 0)
 
-    for vl_log in viral_loads:
-        # Probability of infection corresponding to a certain viral load value in the distribution
-        specific_prob = individual_infection_probability[np.where(
-            (vl_log-step/2-specific_vl)*(vl_log+step/2-specific_vl) < 0)[0]]  # type: ignore
+    cumulative_prob = np.concatenate(([0.], np.cumsum(sorted_prob)))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        pi_means = (cumulative_prob[stops] - cumulative_prob[starts]) / counts
+    pi_means[counts == 0] = np.nan
 
-        pi_means.append(specific_prob.mean())
-        lower_percentiles.append(np.quantile(specific_prob, 0.05))
-        upper_percentiles.append(np.quantile(specific_prob, 0.95))
+    lower_percentiles = np.full(len(viral_loads), np.nan)
+    upper_percentiles = np.full(len(viral_loads), np.nan)
+    for i in np.flatnonzero(counts):
+        lower_percentiles[i], upper_percentiles[i] = np.quantile(
+            sorted_prob[starts[i]:stops[i]], [0.05, 0.95])
 
-    return pi_means, lower_percentiles, upper_percentiles
+    return list(pi_means), list(lower_percentiles), list(upper_percentiles)
 
 
 def manufacture_conditional_probability_data(
     exposure_model: models.ExposureModel,
-    individual_infection_probability: models._VectorisedFloat
+    individual_infection_probability: models._VectorisedFloat,
+    n_bins: int = 100,
 ):
+    """
+    Data of the conditional probability plot, with the probability of
+    infection given the viral load over ``n_bins`` viral load bins.
+    """
     min_vl = 2
     max_vl = 10
-    step = (max_vl - min_vl)/100
+    step = (max_vl - min_vl)/n_bins
     viral_loads = np.arange(min_vl, max_vl, step)
-    specific_vl = np.log10(
-        exposure_model.virus.viral_load_in_sputum)
-    pi_means, lower_percentiles, upper_percentiles = conditional_prob_inf_given_vl_dist(individual_infection_probability, viral_loads,
-                                                                                        specific_vl, step)
     log10_vl_in_sputum = np.log10(
         exposure_model.virus.viral_load_in_sputum)
+    pi_means, lower_percentiles, upper_percentiles = conditional_prob_inf_given_vl_dist(individual_infection_probability, viral_loads,
+                                                                                        log10_vl_in_sputum, step)
 
     return {
         'viral_loads': list(viral_loads),
@@ -382,6 +418,8 @@ def uncertainties_plot(individual_infection_probability: models._VectorisedFloat
     upper_percentiles: list = conditional_probability_data['upper_percentiles']
     log10_vl_in_sputum: list = conditional_probability_data['log10_vl_in_sputum']
 
+    import matplotlib.pyplot as plt
+
     fig, ((axs00, axs01, axs02), (axs10, axs11, axs12)) = plt.subplots(nrows=2, ncols=3,  # type: ignore
                                                                        gridspec_kw={'width_ratios': [5, 0.5] + [1],
                                                                                     'height_ratios': [3, 1], 'wspace': 0},
@@ -428,49 +466,170 @@ def uncertainties_plot(individual_infection_probability: models._VectorisedFloat
     return fig
 
 
-def _figure2bytes(figure):
-    # Draw the image
+#: Supported image formats of the rendered plots, with their MIME type.
+PLOT_FORMATS = {
+    'png': 'image/png',
+    'svg': 'image/svg+xml',
+}
+
+
+def _figure2bytes(figure, format: str = 'png'):
+    """
+    Draw the figure in the given format (see :data:`PLOT_FORMATS`).
+    The figure is closed once drawn, to release its memory: it must
+    therefore only be drawn once.
+    """
+    if format not in PLOT_FORMATS:
+        raise ValueError(f"Unsupported plot format {format!r}. Expected one of {list(PLOT_FORMATS)}.")
+    import matplotlib.pyplot as plt
+
     img_data = io.BytesIO()
-    figure.savefig(img_data, format='png', bbox_inches="tight",
-                   transparent=True, dpi=110)
+    try:
+        figure.savefig(img_data, format=format, bbox_inches="tight",
+                       transparent=True, dpi=110)
+    finally:
+        plt.close(figure)
     return img_data
 
 
-def img2base64(img_data) -> str:
+def img2base64(img_data, format: str = 'png') -> str:
     img_data.seek(0)
     pic_hash = base64.b64encode(img_data.read()).decode('ascii')
     # A src suitable for a tag such as f'<img id="scenario_concentration_plot" src="{result}">.
-    return f'data:image/png;base64,{pic_hash}'
+    return f'data:{PLOT_FORMATS[format]};base64,{pic_hash}'
 
 
-def calculate_vl_scenarios_percentiles(model: mc.ExposureModel) -> typing.Dict[str, mc.ExposureModel]:
+def calculate_vl_scenarios_percentiles(model: models.ExposureModel) -> typing.Dict[str, typing.Any]:
+    """
+    The mean probability of infection for a set of percentiles of the
+    viral load distribution.
+
+    The deposited dose is linear in the viral load, hence each scenario is
+    obtained by rescaling the per-sample dose of the base model by
+    vl / viral_load_in_sputum, rather than re-evaluating the model for each
+    percentile. This does not hold if a minimum background concentration
+    is defined, in which case the scenarios are fully re-computed.
+    """
+    percentiles = np.array([0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99])
     viral_load = model.virus.viral_load_in_sputum
-    scenarios = {}
-    for percentil in (0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99):
-        vl = np.quantile(viral_load, percentil)
+    vls = np.quantile(viral_load, percentiles)
 
-        new_conc_model = copy.deepcopy(model.concentration_model)
-        if isinstance(model.concentration_model, list):
-            new_conc_model = [dataclass_utils.nested_replace(cm, {'infected.virus.viral_load_in_sputum': vl}) for cm in model.concentration_model]
-        else:
-            cm = model.concentration_model
-            new_conc_model = dataclass_utils.nested_replace(cm, {'infected.virus.viral_load_in_sputum': vl})
+    if np.all(np.asarray(model.concentration_model[0].min_background_concentration()) == 0.):
+        dose = model.deposited_exposure()
+        scaling = vls[:, np.newaxis] / np.atleast_1d(viral_load)
+        probabilities = model.infection_probability_given_dose(dose * scaling).mean(axis=-1)
+    else:
+        probabilities = np.array([
+            np.mean(dataclass_utils.replace_concentration_model_properties(
+                model, {'infected.virus.viral_load_in_sputum': vl},
+            ).individual_infection_probability())
+            for vl in vls
+        ])
 
-        specific_vl_scenario = dataclass_utils.nested_replace(model, {'concentration_model': new_conc_model})
-        scenarios[str(vl)] = np.mean(
-            specific_vl_scenario.individual_infection_probability())
     return {
-        'alternative_viral_load': scenarios,
+        'alternative_viral_load': {
+            str(vl): probability for vl, probability in zip(vls, probabilities)
+        },
     }
 
 
-def manufacture_alternative_scenarios(form: VirusFormData) -> typing.Dict[str, mc.ExposureModel]:
+#: The form fields from which an alternative scenario can be derived from the
+#: base model, without re-building the unchanged sub-models.
+DERIVABLE_SCENARIO_FIELDS = frozenset({
+    'mask_type', 'mask_wearing_option', 'ventilation_type', 'hepa_option',
+    'short_range_interactions', 'total_people',
+})
+
+
+def derive_alternative_model(
+        form: VirusFormData,
+        base_model: models.ExposureModel,
+        alternative_form: VirusFormData,
+        sample_size: typing.Optional[int] = None,
+) -> models.ExposureModel:
+    """
+    Build the (single group) model of alternative_form, given the model
+    base_model already built from form.
+
+    Only the sub-models affected by the fields that differ between the two
+    forms are re-built: the others (and therefore their samples and their
+    cached results) are shared with the base model. For instance, changing
+    the mask keeps the same viral load, expiration, activity, room and
+    ventilation, so that the scenarios are paired with the base one.
+    If a field outside of DERIVABLE_SCENARIO_FIELDS differs, the model is
+    entirely re-built from alternative_form.
+    """
+    concentration_model = base_model.concentration_model[0]
+    # The viral load is sampled in all the Monte-Carlo models.
+    sample_size = sample_size or np.size(concentration_model.infected.virus.viral_load_in_sputum)
+    changed = {
+        field.name for field in dataclasses.fields(form)
+        if (getattr(form, field.name) is not getattr(alternative_form, field.name) and
+            getattr(form, field.name) != getattr(alternative_form, field.name))
+    }
+    if (form.occupancy or not changed <= DERIVABLE_SCENARIO_FIELDS or
+            # The expiration of the infected depends on the number of occupants.
+            ('total_people' in changed and form.activity_type == 'smallmeeting') or
+            # Only the removal of the short-range interactions is derived.
+            ('short_range_interactions' in changed and alternative_form.short_range_interactions)):
+        return alternative_form.build_model(sample_size).exposure_models[0]
+
+    infected, exposed = concentration_model.infected, base_model.exposed
+    ventilation = concentration_model.ventilation
+    short_range = base_model.short_range
+
+    if changed & {'mask_type', 'mask_wearing_option'}:
+        # The infected and exposed masks are sampled independently, as in build_model.
+        infected_mask, exposed_mask = (alternative_form.mask(), alternative_form.mask())
+        if isinstance(infected_mask, mc.MCModelBase):
+            infected_mask = infected_mask.build_model(sample_size, alternative_form.sample_dtype())
+            exposed_mask = exposed_mask.build_model(sample_size, alternative_form.sample_dtype())
+        infected = dataclasses.replace(infected, mask=infected_mask)
+        exposed = dataclasses.replace(exposed, mask=exposed_mask)
+        short_range = tuple(dataclasses.replace(sr_model, infected=infected) for sr_model in short_range)
+
+    if 'ventilation_type' in changed:
+        ventilation = alternative_form.ventilation()
+    elif 'hepa_option' in changed:
+        if alternative_form.hepa_option:
+            ventilation = alternative_form.ventilation()
+        else:
+            # Removing the HEPA filter leaves the other ventilations unchanged.
+            ventilation = models.MultipleVentilation(tuple(
+                vent for vent in ventilation.ventilations  # type: ignore
+                if not isinstance(vent, models.HEPAFilter)
+            ))
+
+    if 'short_range_interactions' in changed:
+        short_range = ()
+    if 'total_people' in changed:
+        exposed = dataclasses.replace(
+            exposed, number=alternative_form.total_people - alternative_form.infected_people)
+
+    return dataclasses.replace(
+        base_model,
+        concentration_model=(dataclasses.replace(
+            concentration_model, infected=infected, ventilation=ventilation),),
+        short_range=short_range,
+        exposed=exposed,
+    )
+
+
+def manufacture_alternative_scenarios(
+        form: VirusFormData,
+        base_model: typing.Optional[models.ExposureModel] = None,
+) -> typing.Dict[str, models.ExposureModel]:
     """
     Generates the data structure containing all the alternative scenarios.
     It is only compatible with single group occupancy models, therefore
     it returns an ExposureModel object and not an ExposureModelGroup.
+    The scenarios are derived from base_model (the model of the form,
+    built if not given), see derive_alternative_model.
     """
-    scenarios: typing.Dict[str, models.ExposureModelGroup] = {}
+    if base_model is None:
+        base_model = form.build_model().exposure_models[0]
+    base_form = form
+    alternatives: typing.Dict[str, VirusFormData] = {}
     if (form.short_range_option == "short_range_no"):
         # Two special option cases - HEPA and/or FFP2 masks.
         FFP2_being_worn = bool(form.mask_wearing_option ==
@@ -479,7 +638,7 @@ def manufacture_alternative_scenarios(form: VirusFormData) -> typing.Dict[str, m
             FFP2andHEPAalternative = dataclass_utils.replace(
                 form, mask_type='Type I')
             if not (form.hepa_option and form.mask_wearing_option == 'mask_on' and form.mask_type == 'Type I'):
-                scenarios['Base scenario with HEPA filter and Type I masks'] = FFP2andHEPAalternative.build_model()
+                alternatives['Base scenario with HEPA filter and Type I masks'] = FFP2andHEPAalternative
         if not FFP2_being_worn and form.hepa_option:
             noHEPAalternative = dataclass_utils.replace(form, mask_type='FFP2')
             noHEPAalternative = dataclass_utils.replace(
@@ -487,7 +646,7 @@ def manufacture_alternative_scenarios(form: VirusFormData) -> typing.Dict[str, m
             noHEPAalternative = dataclass_utils.replace(
                 noHEPAalternative, hepa_option=False)
             if not (not form.hepa_option and FFP2_being_worn):
-                scenarios['Base scenario without HEPA filter, with FFP2 masks'] = noHEPAalternative.build_model()
+                alternatives['Base scenario without HEPA filter, with FFP2 masks'] = noHEPAalternative
 
         # The remaining scenarios are based on Type I masks (possibly not worn)
         # and no HEPA filtration.
@@ -501,15 +660,14 @@ def manufacture_alternative_scenarios(form: VirusFormData) -> typing.Dict[str, m
             form, mask_wearing_option='mask_off')
 
         if form.ventilation_type == 'mechanical_ventilation':
-            # scenarios['Mechanical ventilation with Type I masks'] = with_mask.build_model()
+            # alternatives['Mechanical ventilation with Type I masks'] = with_mask
             if not (form.mask_wearing_option == 'mask_off'):
-                scenarios['Mechanical ventilation without masks'] = without_mask.build_model(
-                )
+                alternatives['Mechanical ventilation without masks'] = without_mask
 
         elif form.ventilation_type == 'natural_ventilation':
-            # scenarios['Windows open with Type I masks'] = with_mask.build_model()
+            # alternatives['Windows open with Type I masks'] = with_mask
             if not (form.mask_wearing_option == 'mask_off'):
-                scenarios['Windows open without masks'] = without_mask.build_model()
+                alternatives['Windows open without masks'] = without_mask
 
         # No matter the ventilation scheme, we include scenarios which don't have any ventilation.
         with_mask_no_vent = dataclass_utils.replace(
@@ -518,9 +676,9 @@ def manufacture_alternative_scenarios(form: VirusFormData) -> typing.Dict[str, m
             without_mask, ventilation_type='no_ventilation')
 
         if not (form.mask_wearing_option == 'mask_on' and form.mask_type == 'Type I' and form.ventilation_type == 'no_ventilation'):
-            scenarios['No ventilation with Type I masks'] = with_mask_no_vent.build_model()
+            alternatives['No ventilation with Type I masks'] = with_mask_no_vent
         if not (form.mask_wearing_option == 'mask_off' and form.ventilation_type == 'no_ventilation'):
-            scenarios['Neither ventilation nor masks'] = without_mask_or_vent.build_model()
+            alternatives['Neither ventilation nor masks'] = without_mask_or_vent
     else:
         # Adjust the number of exposed people with long-range exposure based on short-range interactions
         if not form.occupancy:
@@ -535,11 +693,12 @@ def manufacture_alternative_scenarios(form: VirusFormData) -> typing.Dict[str, m
                         # Update the total_people with the adjusted value
                        group['total_people'] = max(0, total_people - short_range_count)
             no_short_range_alternative = dataclass_utils.replace(form, short_range_interactions={}, occupancy=form.occupancy)        
-        scenarios['Base scenario without short-range interactions'] = no_short_range_alternative.build_model()
+        alternatives['Base scenario without short-range interactions'] = no_short_range_alternative
 
-    for scenario_name, scenario in scenarios.items():
-        scenarios[scenario_name] = scenario.exposure_models[0] # type: ignore
-    return scenarios
+    return {
+        scenario_name: derive_alternative_model(base_form, base_model, alternative_form)
+        for scenario_name, alternative_form in alternatives.items()
+    }
 
 
 def scenario_statistics(
@@ -598,7 +757,8 @@ def comparison_report(
 def alternative_scenarios_data(form: VirusFormData, 
                                report_data: typing.Dict[str, typing.Any], 
                                executor_factory: typing.Callable[[], concurrent.futures.Executor]) -> typing.Dict[str, typing.Any]:
-    alternative_scenarios: typing.Dict[str, typing.Any] = manufacture_alternative_scenarios(form=form)
+    alternative_scenarios: typing.Dict[str, typing.Any] = manufacture_alternative_scenarios(
+        form=form, base_model=report_data['model'])
     return {
         'alternative_scenarios': comparison_report(form=form, report_data=report_data, scenarios=alternative_scenarios, executor_factory=executor_factory)
     }
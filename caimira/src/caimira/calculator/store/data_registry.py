@@ -470,6 +470,7 @@ class DataRegistry:
 
     monte_carlo = {
         "sample_size": 250000,
+        "precision": "float64",
         "references": "N/A.",
     }
 
@@ -2,9 +2,6 @@ import dataclasses
 import logging
 import typing
 import numpy as np
-import matplotlib.pyplot as plt
-from scipy.signal import find_peaks
-import pandas as pd
 import re
 
 from ..form_validator import FormData, cast_class_fields
@@ -99,27 +96,41 @@ class CO2FormData(FormData):
                             if not re.compile("^(2[0-3]|[01]?[0-9]):([0-5]?[0-9])$").match(time):
                                 raise TypeError(f'Wrong time format - "HH:MM". Got "{time}".')        
 
-    def find_change_points(self) -> list:
+    def find_change_points(self, max_points: typing.Optional[int] = None) -> list:
         """
         Perform change point detection using scipy library (find_peaks method) with rolling average of data.
         Incorporate existing state change candidates and adjust the result accordingly.
         Returns a list of the detected ventilation transition times, discarding any occupancy state change.
+
+        Irregularly sampled data (e.g. with gaps) is first resampled at its
+        typical time step. If ``max_points`` is given and the data is longer,
+        the peaks and valleys are detected on the smoothed data downsampled
+        to at most ``max_points``, and then refined locally on the full data.
         """
-        times: list = self.CO2_data['times']
-        CO2_values: list = self.CO2_data['CO2']
+        times = np.asarray(self.CO2_data['times'], dtype=float)
+        CO2_values = np.asarray(self.CO2_data['CO2'], dtype=float)
 
         if len(times) != len(CO2_values):
             raise ValueError("times and CO2 values must have the same length.")
 
-        # Time difference between two consecutive time data entries, in seconds
-        diff = (times[1] - times[0]) * 3600 # Initial data points in absolute hours, e.g. 14.78
+        # Typical time difference between two consecutive time data entries, in hours
+        steps = np.diff(times)
+        step = float(np.median(steps))
+        if steps.min() < 0.5 * step or steps.max() > 1.5 * step:
+            # Resample the data at regular intervals (times in absolute hours, e.g. 14.78).
+            sample_times = times[0] + step * np.arange(int(round((times[-1] - times[0]) / step)) + 1)
+            sample_values = np.interp(sample_times, times, CO2_values)
+        else:
+            sample_times, sample_values = times, CO2_values
+        # In seconds
+        diff = step * 3600
 
         # Calculate minimum interval for smoothing technique
         smooth_min_interval_in_minutes = 1 # Minimum time difference for smooth technique
         window_size = max(int((smooth_min_interval_in_minutes * 60) // diff), 1)
 
         # Applying a rolling average to smooth the initial data
-        smoothed_co2 = pd.Series(CO2_values).rolling(window=window_size, center=True).mean()
+        smoothed_co2 = _rolling_mean(sample_values, window_size)
 
         # Calculate minimum interval for peaks and valleys detection
         peak_valley_min_interval_in_minutes = 15 # Minimum time difference between two peaks or two valleys
@@ -129,28 +140,69 @@ class CO2FormData(FormData):
         width_min_interval_in_minutes = 20 # Minimum duration of a valley
         min_valley_width = max(int((width_min_interval_in_minutes * 60) // diff), 1)
 
+        factor = 1
+        if max_points is not None and len(smoothed_co2) > max_points:
+            factor = int(np.ceil(len(smoothed_co2) / max_points))
+        detection_co2 = _block_mean(smoothed_co2, factor)
+
+        from scipy.signal import find_peaks
+
         # Find peaks (maxima) in the smoothed data applying the distance factor
-        peaks, _ = find_peaks(smoothed_co2.values, prominence=100, distance=min_distance_points)
+        peaks, _ = find_peaks(detection_co2, prominence=100, distance=max(min_distance_points // factor, 1))
         
         # Find valleys (minima) by inverting the smoothed data and applying the width and distance factors
-        valleys, _ = find_peaks(-smoothed_co2.values, prominence=50, width=min_valley_width, distance=min_distance_points)
+        valleys, _ = find_peaks(-detection_co2, prominence=50, width=max(min_valley_width // factor, 1),
+                                distance=max(min_distance_points // factor, 1))
 
-        # Extract peak and valley timestamps
-        timestamps = np.array(times)
-        peak_timestamps = timestamps[peaks]
-        valley_timestamps = timestamps[valleys]
+        if factor > 1:
+            # Refine each extremum within the neighbouring blocks of the full data.
+            peaks = _refine_extrema(smoothed_co2, peaks, factor, np.nanargmax)
+            valleys = _refine_extrema(smoothed_co2, valleys, factor, np.nanargmin)
 
-        return sorted(np.concatenate((peak_timestamps, valley_timestamps)))
+        # Extract peak and valley timestamps, as the nearest data timestamps
+        change_times = sample_times[np.concatenate((peaks, valleys)).astype(int)]
+        nearest = np.clip(np.searchsorted(times, change_times), 1, len(times) - 1)
+        nearest -= (change_times - times[nearest - 1]) < (times[nearest] - change_times)
+        return sorted(times[nearest])
 
     def generate_ventilation_plot(self,
                                   ventilation_transition_times: typing.Optional[list] = None,
                                   occupancy_transition_times: typing.Optional[list] = None,
-                                  predictive_CO2: typing.Optional[list] = None):
-            
+                                  predictive_CO2: typing.Optional[list] = None,
+                                  render: bool = True,
+                                  plot_format: str = 'png'):
+            """
+            Returns the plot of the CO2 data (as a base64 encoded image
+            ``src``, or None if ``render`` is False) and the data series
+            needed to draw it on the client side.
+            """
             # Plot data (x-axis: times; y-axis: CO2 concentrations)
             times_values: list = self.CO2_data['times']
             CO2_values: list = self.CO2_data['CO2']
 
+            img = self._render_ventilation_plot(
+                times_values, CO2_values, ventilation_transition_times,
+                occupancy_transition_times, predictive_CO2, plot_format,
+            ) if render else None
+
+            vent_plot_data = {
+                'plot': img,
+                'times': times_values,
+                'CO2': CO2_values,
+                'occ_trans_time': occupancy_transition_times,
+                'vent_trans_time': ventilation_transition_times,
+                'predictive_CO2': predictive_CO2,
+            }
+
+            return img, vent_plot_data
+
+    def _render_ventilation_plot(self, times_values: list, CO2_values: list,
+                                 ventilation_transition_times: typing.Optional[list],
+                                 occupancy_transition_times: typing.Optional[list],
+                                 predictive_CO2: typing.Optional[list],
+                                 plot_format: str) -> str:
+            import matplotlib.pyplot as plt
+
             fig = plt.figure(figsize=(7, 4), dpi=110)
             plt.plot(times_values, CO2_values, label='CO₂ Data')
             
@@ -175,16 +227,7 @@ class CO2FormData(FormData):
             plt.ylabel('Concentration (ppm)')
             plt.legend()
 
-            vent_plot_data = {
-                'plot': img2base64(_figure2bytes(fig)),
-                'times': times_values,
-                'CO2': CO2_values,
-                'occ_trans_time': occupancy_transition_times,
-                'vent_trans_time': ventilation_transition_times,
-                'predictive_CO2': predictive_CO2,
-            }
-
-            return img2base64(_figure2bytes(fig)), vent_plot_data
+            return img2base64(_figure2bytes(fig, plot_format), plot_format)
 
     def ventilation_transition_times(self) -> typing.Tuple[float]:
         '''
@@ -216,3 +259,43 @@ class CO2FormData(FormData):
             )
 
 cast_class_fields(CO2FormData)
+
+
+def _rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    The centred rolling mean of the values, NaN where the window is
+    incomplete (as pandas' ``Series.rolling(window, center=True).mean()``).
+    """
+    result = np.full(len(values), np.nan)
+    if window > len(values):
+        return result
+    cumulative = np.concatenate([[0.], np.cumsum(values)])
+    result[window // 2: window // 2 + len(values) - window + 1] = (
+        cumulative[window:] - cumulative[:-window]) / window
+    return result
+
+
+def _block_mean(values: np.ndarray, factor: int) -> np.ndarray:
+    """The means of consecutive blocks of ``factor`` values (the last one possibly shorter)."""
+    if factor == 1:
+        return values
+    padded = np.concatenate([values, np.full(-len(values) % factor, np.nan)])
+    blocks = padded.reshape(-1, factor)
+    # A block is NaN if it only contains NaN, e.g. at the edges of a rolling mean.
+    counts = np.sum(~np.isnan(blocks), axis=1)
+    sums = np.nansum(blocks, axis=1)
+    return np.divide(sums, counts, out=np.full(len(blocks), np.nan), where=counts > 0)
+
+
+def _refine_extrema(values: np.ndarray, block_indices: np.ndarray, factor: int,
+                    arg_extremum: typing.Callable[[np.ndarray], int]) -> np.ndarray:
+    """
+    The indices of the extrema of the values around each of the given
+    extrema of the block means (i.e. within the block and its neighbours).
+    """
+    indices = []
+    for block_index in block_indices:
+        start = max((block_index - 1) * factor, 0)
+        stop = min((block_index + 2) * factor, len(values))
+        indices.append(start + arg_extremum(values[start:stop]))
+    return np.array(indices, dtype=int)
@@ -391,6 +391,18 @@ class FormData:
 
     def build_model(self, sample_size: typing.Optional[int] = None):
         raise NotImplementedError("Subclass must implement")
+
+    def sample_dtype(self) -> np.dtype:
+        """
+        The floating point type of the Monte-Carlo samples, from the
+        "precision" of the data registry (float64 by default). With float32,
+        the samples (and most of the computations on them) take half the
+        memory, the integrated exposures being still accumulated in float64.
+        """
+        precision = self.data_registry.monte_carlo.get('precision', 'float64')
+        if precision not in ('float32', 'float64'):
+            raise ValueError(f'Monte-Carlo precision should be "float32" or "float64". Got {precision!r}.')
+        return np.dtype(precision)
     
     def population_present_changes(self, transition_times_list: typing.Tuple[float, ...]) -> typing.List[float]:
         """
@@ -256,7 +256,7 @@ class VirusFormData(FormData):
         
         room: models.Room = self.initialize_room()
         ventilation: models._VentilationBase = self.ventilation()
-        infected_population: models.InfectedPopulation = self.infected_population().build_model(sample_size)
+        infected_population: models.InfectedPopulation = self.infected_population().build_model(sample_size, self.sample_dtype())
 
         short_range = defaultdict(list)
         if self.short_range_option == "short_range_yes":
@@ -303,7 +303,7 @@ class VirusFormData(FormData):
                     geographical_data=geographical_data,
                     exposed_to_short_range=self.short_range_occupants,
                 ),)
-            ).build_model(sample_size)
+            ).build_model(sample_size, self.sample_dtype())
         else:
             exposure_model_set = []
             for exposure_group in self.occupancy.keys():
@@ -324,7 +324,7 @@ class VirusFormData(FormData):
             return mc.ExposureModelGroup(
                 data_registry=self.data_registry,
                 exposure_models=tuple(exposure_model_set)
-            ).build_model(sample_size)
+            ).build_model(sample_size, self.sample_dtype())
 
     def build_CO2_model(self, sample_size=None) -> models.CO2ConcentrationModel:
         """
@@ -352,7 +352,7 @@ class VirusFormData(FormData):
             room=self.initialize_room(),
             ventilation=self.ventilation(),
             CO2_emitters=population,
-        ).build_model(size=sample_size)
+        ).build_model(size=sample_size, dtype=self.sample_dtype())
 
     def tz_name_and_utc_offset(self) -> typing.Tuple[str, float]:
         """
@@ -931,3 +931,37 @@ def test_population_generation_from_occupancy(baseline_form: virus_validator.Vir
         assert infected_obj.number.interval().boundaries() == ((9, 10), (10, 11), (11, 12), (13, 17))
         assert infected_obj.number.transition_times == (9, 10, 11, 12, 13, 17)
         assert infected_obj.number.values == (3, 2, 3, 0, 2)    
+
+
+@pytest.mark.parametrize(
+    "short_range_option", ["short_range_no", "short_range_yes"],
+)
+def test_float32_precision(baseline_form_data, short_range_option):
+    baseline_form_data['short_range_option'] = short_range_option
+    baseline_form_data['short_range_interactions'] = '{"group_1": [{"expiration": "Shouting", "start_time": "10:30", "duration": 30}]}'
+    baseline_form_data['short_range_occupants'] = 5
+    probabilities = {}
+    for precision in ['float64', 'float32']:
+        data_registry = DataRegistry()
+        data_registry.monte_carlo = dict(data_registry.monte_carlo, precision=precision)
+        form = virus_validator.VirusFormData.from_dict(baseline_form_data, data_registry)
+        # The same samples, rounded to float32 in the second case.
+        np.random.seed(2024)
+        model = form.build_model(50_000).exposure_models[0]
+        assert model.concentration_model[0].infected.virus.viral_load_in_sputum.dtype == np.dtype(precision)
+        assert model.concentration_model[0].concentration(11.).dtype == np.dtype(precision)
+        probabilities[precision] = model.individual_infection_probability()
+
+    # The deposited exposure (and therefore the probability) is accumulated in float64.
+    assert probabilities['float32'].dtype == np.float64
+    # The probability of infection is in %.
+    npt.assert_allclose(probabilities['float32'], probabilities['float64'], rtol=1e-4, atol=1e-4)
+    npt.assert_allclose(probabilities['float32'].mean(), probabilities['float64'].mean(), rtol=1e-6)
+
+
+def test_invalid_precision(baseline_form_data):
+    data_registry = DataRegistry()
+    data_registry.monte_carlo = dict(data_registry.monte_carlo, precision='float16')
+    form = virus_validator.VirusFormData.from_dict(baseline_form_data, data_registry)
+    with pytest.raises(ValueError, match='Monte-Carlo precision should be "float32" or "float64"'):
+        form.build_model(10)
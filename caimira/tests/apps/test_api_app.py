@@ -1,7 +1,29 @@
+import json
 import os
+
+import numpy as np
 from tornado.testing import AsyncHTTPTestCase
 from caimira.api.app import Application
 
+
+def CO2_room_form_data(volume: float):
+    times = [float(time) for time in np.round(np.arange(14., 17.5, 1 / 120), 4)]
+    # The CO2 concentration rises (occupied room) and then falls (ventilated room).
+    CO2 = [
+        440 + 800 * (1 - np.exp(-2 * (time - 14))) if time < 15.5 else
+        440 + 800 * (1 - np.exp(-3)) * np.exp(-3 * (time - 15.5))
+        for time in times
+    ]
+    return {
+        'CO2_data': json.dumps({'times': times, 'CO2': CO2}),
+        'fitting_ventilation_states': '[14.0, 15.5]',
+        'room_volume': volume, 'total_people': 4,
+        'exposed_start': '14:00', 'exposed_finish': '17:30',
+        'infected_start': '14:00', 'infected_finish': '17:30',
+        'exposed_lunch_option': False, 'infected_lunch_option': False,
+    }
+
+
 class TestAPIApp(AsyncHTTPTestCase):
     def get_app(self):
         return Application(debug=True)
@@ -39,3 +61,30 @@ class TestAPIApp(AsyncHTTPTestCase):
         response = self.fetch("/", method="OPTIONS", headers={"Origin": "null"})
         assert response.code == 204
         assert "Access-Control-Allow-Origin" not in response.headers
+
+    def test_co2_report_batch(self):
+        rooms = {
+            'room_1': CO2_room_form_data(100),
+            'room_2': CO2_room_form_data(50),
+            'invalid_room': dict(CO2_room_form_data(100), CO2_data=json.dumps({'times': [14.], 'CO2': [440.]})),
+        }
+        response = self.fetch("/co2/report/batch", method="POST", body=json.dumps({'rooms': rooms}))
+        assert response.code == 200
+        assert response.headers['Content-Type'].startswith('application/x-ndjson')
+
+        events = [json.loads(line) for line in response.body.decode().splitlines()]
+        assert events[-1] == {'stage': 'done', 'data': {'rooms': 3, 'failed': 1}}
+        room_reports = {event['data']['room']: event['data'] for event in events[:-1]}
+        assert set(room_reports) == set(rooms)
+        assert room_reports['invalid_room']['status'] == 'error'
+        for room in ['room_1', 'room_2']:
+            results = room_reports[room]['results']
+            assert len(results['ventilation_values']) == 2
+            assert results['exhalation_rate'] > 0
+            assert len(results['predictive_CO2']) == len(json.loads(rooms[room]['CO2_data'])['times'])
+        # The same CO2 curve in a smaller room corresponds to a smaller exhalation rate.
+        assert room_reports['room_2']['results']['exhalation_rate'] < room_reports['room_1']['results']['exhalation_rate']
+
+    def test_co2_report_batch_invalid(self):
+        response = self.fetch("/co2/report/batch", method="POST", body=json.dumps({'rooms': []}))
+        assert response.code == 400
@@ -0,0 +1,100 @@
+import json
+
+import numpy as np
+import pytest
+
+from caimira.api.controller import report_serializer
+from caimira.api.controller.virus_report_controller import strip_models
+
+
+@pytest.fixture
+def report_data():
+    return {
+        "model": object(),
+        "times": [0., 0.5, 1.],
+        "CO2_concentrations": [np.float64(440.), np.float64(600.), np.float64(650.)],
+        "groups": {
+            "group_1": {
+                "model": object(),
+                "prob_inf": np.float64(12.5),
+                "prob_dist": list(np.linspace(0, 100, 11)),
+                "concentrations": np.array([0., 1., 2.]),
+                "exposed_presence_intervals": [(0., 1.)],
+            },
+        },
+    }
+
+
+def test_strip_models(report_data):
+    result = strip_models(report_data)
+    assert "model" not in result
+    assert "model" not in result["groups"]["group_1"]
+
+
+def test_strip_models_repr(report_data):
+    result = strip_models(report_data, include_model_repr=True)
+    assert isinstance(result["model"], str)
+
+
+def test_json_encoding(report_data):
+    body, content_type = report_serializer.encode(strip_models(report_data))
+    assert content_type.startswith('application/json')
+    data = json.loads(body)
+    assert data["groups"]["group_1"]["concentrations"] == [0., 1., 2.]
+    assert data["groups"]["group_1"]["prob_inf"] == 12.5
+
+
+def test_packed_arrays(report_data):
+    data = report_serializer.to_serializable(strip_models(report_data), packed_arrays=True)
+    packed = data["groups"]["group_1"]["prob_dist"]
+    assert packed["dtype"] == '<f4'
+    np.testing.assert_allclose(
+        np.frombuffer(packed["data"], dtype=packed["dtype"]).reshape(packed["shape"]),
+        np.linspace(0, 100, 11),
+    )
+    # Sequences which are not purely numeric are left as lists (of arrays).
+    intervals = data["groups"]["group_1"]["exposed_presence_intervals"]
+    assert isinstance(intervals, list)
+    assert intervals[0]["shape"] == [2]
+
+
+@pytest.mark.parametrize(
+    ["accept", "expected"],
+    [
+        [None, 'json'],
+        ['application/json', 'json'],
+        ['application/msgpack', 'msgpack'],
+        ['application/json, application/x-msgpack;q=0.9', 'msgpack'],
+        ['application/msgpack;q=0', 'json'],
+    ],
+)
+def test_negotiate_format(monkeypatch, accept, expected):
+    monkeypatch.setattr(report_serializer, 'msgpack', object())
+    assert report_serializer.negotiate_format(accept) == expected
+
+
+def test_negotiate_format_without_msgpack(monkeypatch):
+    monkeypatch.setattr(report_serializer, 'msgpack', None)
+    assert report_serializer.negotiate_format('application/msgpack') == 'json'
+
+
+def test_msgpack_encoding(report_data):
+    msgpack = pytest.importorskip('msgpack')
+    body, content_type = report_serializer.encode(strip_models(report_data), 'msgpack')
+    assert content_type == report_serializer.MSGPACK_CONTENT_TYPE
+    data = msgpack.unpackb(body)
+    assert data["groups"]["group_1"]["concentrations"]["shape"] == [3]
+
+
+def test_stream_events():
+    assert report_serializer.negotiate_stream_format('text/event-stream') == 'sse'
+    assert report_serializer.negotiate_stream_format(None) == 'ndjson'
+
+    data = {'prob_inf': np.float64(12.5), 'concentrations': np.array([0., 1.])}
+    event = report_serializer.encode_event('report_data', data, 'sse').decode()
+    assert event.startswith('event: report_data\ndata: ') and event.endswith('\n\n')
+    assert json.loads(event.split('data: ', 1)[1]) == {'prob_inf': 12.5, 'concentrations': [0., 1.]}
+
+    line = report_serializer.encode_event('report_data', data).decode()
+    assert line.endswith('\n') and line.count('\n') == 1
+    assert json.loads(line) == {'stage': 'report_data', 'data': {'prob_inf': 12.5, 'concentrations': [0., 1.]}}
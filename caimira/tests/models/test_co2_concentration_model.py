@@ -4,6 +4,7 @@ import typing
 import pytest
 
 from caimira.calculator.models import models
+from caimira.calculator.validators.co2 import co2_validator
 from caimira.calculator.validators.co2.co2_validator import CO2FormData
 
 
@@ -84,6 +85,37 @@ def test_find_change_points(scenario_data, room_volume, max_total_people, start,
     assert np.allclose(find_points, state_changes, rtol=1e-2)
 
 
+@pytest.mark.parametrize("render, plot_format, mime", [
+    [True, 'png', 'image/png'],
+    [True, 'svg', 'image/svg+xml'],
+    [False, 'png', None],
+])
+def test_ventilation_plot(office_scenario_1_sensor_data, render, plot_format, mime):
+    import matplotlib.pyplot as plt
+
+    CO2_form_model: CO2FormData = CO2FormData(
+        CO2_data=office_scenario_1_sensor_data,
+        fitting_ventilation_states=[],
+        exposed_start="14:00",
+        exposed_finish="17:30",
+        total_people=4,
+        room_volume=102,
+    )
+    n_figures = len(plt.get_fignums())
+    img, plot_data = CO2_form_model.generate_ventilation_plot(
+        ventilation_transition_times=[14.78, 15.1], render=render, plot_format=plot_format)
+
+    if mime:
+        assert img.startswith(f'data:{mime};base64,')
+    else:
+        assert img is None
+    assert plot_data['plot'] == img
+    assert plot_data['times'] == office_scenario_1_sensor_data['times']
+    assert plot_data['vent_trans_time'] == [14.78, 15.1]
+    # The figure is not left open.
+    assert len(plt.get_fignums()) == n_figures
+
+
 @pytest.mark.parametrize(
     "scenario_data, room_volume, occupancy, presence_interval, all_state_changes", [
         ["office_scenario_1_sensor_data", 102, (4,), (14, 17.5), (14, 14.25, 14.78, 15.1, 15.53, 15.87, 16.52, 16.83, 17.5)],
@@ -153,4 +185,39 @@ def test_concentration_after_last_state_change(simple_co2_conc_model, simple_co2
     npt.assert_almost_equal(simple_co2_conc_model._normed_concentration(time), simple_co2_conc_model_extended_presence._normed_concentration(time))
     npt.assert_almost_equal(simple_co2_conc_model.normed_integrated_concentration(start, stop), simple_co2_conc_model_extended_presence.normed_integrated_concentration(start, stop))
     npt.assert_almost_equal(simple_co2_conc_model.integrated_concentration(start, stop), simple_co2_conc_model_extended_presence.integrated_concentration(start, stop))
-    
\ No newline at end of file
+    
+
+@pytest.mark.parametrize("window", [1, 2, 5, 6, 1000])
+def test_rolling_mean(window):
+    import pandas as pd
+
+    values = np.random.default_rng(0).normal(800, 100, 200)
+    npt.assert_allclose(
+        co2_validator._rolling_mean(values, window),
+        pd.Series(values).rolling(window=window, center=True).mean().values,
+    )
+
+
+@pytest.mark.parametrize("sampling", ["irregular", "multi_resolution"])
+def test_find_change_points_sampling(office_scenario_1_sensor_data, sampling):
+    times, CO2 = np.array(office_scenario_1_sensor_data['times']), np.array(office_scenario_1_sensor_data['CO2'])
+    max_points = None
+    if sampling == "irregular":
+        # Randomly drop a fifth of the data points.
+        keep = np.sort(np.random.default_rng(1).choice(len(times), int(0.8 * len(times)), replace=False))
+        times, CO2 = times[keep], CO2[keep]
+    else:
+        max_points = len(times) // 4
+
+    CO2_form_model: CO2FormData = CO2FormData(
+        CO2_data={'times': list(times), 'CO2': list(CO2)},
+        fitting_ventilation_states=[],
+        exposed_start="14:00",
+        exposed_finish="17:30",
+        total_people=4,
+        room_volume=102,
+    )
+    find_points = CO2_form_model.find_change_points(max_points=max_points)
+    assert np.allclose(find_points, (14.78, 15.1, 15.53, 15.87, 16.52, 16.83), rtol=1e-2)
+    # The change points are data timestamps.
+    assert set(find_points) <= set(times)
@@ -7,7 +7,7 @@ from dataclasses import dataclass
 
 from caimira.calculator.models import models
 from caimira.calculator.models.models import ExposureModel
-from caimira.calculator.models.dataclass_utils import replace
+from caimira.calculator.models.dataclass_utils import replace, replace_concentration_model_properties
 from caimira.calculator.models.monte_carlo.data import expiration_distributions
 from caimira.calculator.store.data_registry import DataRegistry
 
@@ -433,3 +433,25 @@ def test_host_immunity_vectorisation(data_registry, sr_model, cases_model, cm, h
     )
     assert isinstance(inf_probability, np.ndarray)
     assert inf_probability.shape == (2, )
+
+
+def test_interval_transition_times(data_registry, baseline_exposure_model):
+    ventilation = models.MultipleVentilation((
+        models.AirChange(active=models.SpecificInterval(((1., 2.5), )), air_exch=2.),
+        models.HEPAFilter(active=models.PeriodicInterval(period=240, duration=60, start=1.), q_air_mech=100.),
+    ))
+    model = replace_concentration_model_properties(
+        baseline_exposure_model, {'ventilation': ventilation})
+    expected = {
+        # Presence of the exposed and infected.
+        0., 4., 5., 8.,
+        # AirChange.
+        1., 2.5,
+        # HEPAFilter.
+        2., 6., 9., 10., 13., 14., 17., 18., 21., 22.,
+    }
+    assert model.interval_transition_times() == expected
+
+    # The baseline ventilation is active from 0 to 24.
+    group = models.ExposureModelGroup(data_registry, (model, baseline_exposure_model))
+    assert group.interval_transition_times() == expected | {24.}
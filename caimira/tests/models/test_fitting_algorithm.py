@@ -58,4 +58,94 @@ def test_fitting_algorithm(data_registry, activity_type, ventilation_active, air
 
     ventilation_lsp_values = fit_parameters['ventilation_lsp_values']
     npt.assert_allclose(ventilation_lsp_values, flow_rate_lsp, rtol=1e-2)
-    
\ No newline at end of file
+    
+
+def test_vectorised_CO2_curve(data_registry):
+    # Nobody before 8h nor after 17h, and no ventilation between 11h and 12h.
+    occupancy = models.IntPiecewiseConstant(
+        transition_times=(7.5, 8., 12., 13., 17.), values=(0, 2, 1, 2))
+    ventilation_transition_times = (8., 10., 11., 12., 17.)
+    exhalation_rate, air_exch = 0.57, np.array([1.25, 3.25, 0., 0.25])
+    conc_model = models.CO2ConcentrationModel(
+        data_registry=data_registry,
+        room=models.Room(volume=75),
+        ventilation=models.CustomVentilation(models.PiecewiseConstant(
+            ventilation_transition_times, tuple(air_exch))),
+        CO2_emitters=models.SimplePopulation(
+            number=occupancy, presence=None,
+            activity=models.Activity(exhalation_rate=exhalation_rate, inhalation_rate=exhalation_rate),
+        ),
+    )
+    times = np.linspace(7, 18, 200)
+    data_model = models.CO2DataModel(
+        data_registry=data_registry,
+        room=models.Room(volume=75, capacity=2),
+        occupancy=occupancy,
+        ventilation_transition_times=ventilation_transition_times,
+        times=times,
+        CO2_concentrations=[conc_model.concentration(float(time)) for time in times],
+    )
+
+    concentrations, jacobian = data_model._CO2_curve(exhalation_rate, air_exch)
+    npt.assert_allclose(concentrations, data_model.CO2_concentrations, rtol=1e-10)
+
+    # The analytic jacobian matches the finite differences.
+    x, eps = np.concatenate([[exhalation_rate], air_exch]), 1e-6
+    for i in range(len(x)):
+        dx = np.zeros_like(x)
+        dx[i] = eps
+        finite_difference = (data_model._CO2_curve((x + dx)[0], (x + dx)[1:])[0] - concentrations) / eps
+        npt.assert_allclose(jacobian[:, i], finite_difference, rtol=1e-3, atol=1e-2)
+
+    fit_parameters = data_model.CO2_fit_params()
+    npt.assert_allclose(fit_parameters['exhalation_rate'], exhalation_rate, rtol=1e-4)
+    npt.assert_allclose(fit_parameters['ventilation_values'], air_exch, atol=1e-4)
+
+
+def test_incremental_fit(data_registry):
+    from caimira.calculator.models.co2_incremental_fit import IncrementalCO2Fit
+
+    occupancy = models.IntPiecewiseConstant(transition_times=(8., 12., 13., 17.), values=(2, 1, 2))
+    ventilation_transition_times = (8., 10., 11., 12., 17.)
+    air_exch = [1.25, 3.25, 1.45, 0.25]
+    conc_model = models.CO2ConcentrationModel(
+        data_registry=data_registry,
+        room=models.Room(volume=75),
+        ventilation=models.CustomVentilation(models.PiecewiseConstant(
+            ventilation_transition_times, tuple(air_exch))),
+        CO2_emitters=models.SimplePopulation(
+            number=occupancy, presence=None, activity=models.Activity.types['Standing']),
+    )
+    times = np.linspace(8, 17, 541)
+    CO2_concentrations = np.array([conc_model.concentration(float(time)) for time in times])
+
+    live_fit = IncrementalCO2Fit(
+        data_registry, models.Room(volume=75, capacity=2), occupancy, ventilation_transition_times)
+    assert live_fit.update(times[:1], CO2_concentrations[:1]) is None
+    previous_params = None
+    for start in range(1, len(times), 60):
+        new_times = times[start:start + 60]
+        fit_results = live_fit.update(new_times, CO2_concentrations[start:start + 60])
+        if previous_params is not None:
+            # Only the intervals with new readings are refitted.
+            untouched = np.setdiff1d(np.arange(len(air_exch)), live_fit.intervals(new_times))
+            npt.assert_array_equal(live_fit.params[1:][untouched], previous_params[1:][untouched])
+        previous_params = live_fit.params.copy()
+
+    npt.assert_allclose(fit_results['exhalation_rate'], conc_model.CO2_emitters.activity.exhalation_rate, rtol=1e-2)
+    npt.assert_allclose(fit_results['ventilation_values'], air_exch, rtol=1e-2)
+    with pytest.raises(ValueError, match='follow the buffered ones'):
+        live_fit.update([16.], [500.])
+
+
+def test_incremental_fit_buffer(data_registry):
+    from caimira.calculator.models.co2_incremental_fit import IncrementalCO2Fit
+
+    live_fit = IncrementalCO2Fit(
+        data_registry, models.Room(volume=75),
+        models.IntPiecewiseConstant(transition_times=(8., 17.), values=(2, )), (8., 17.), buffer_size=5)
+    live_fit.update([8., 9., 10.], [440., 500., 550.])
+    live_fit.update([11., 12., 13., 14.], [580., 600., 610., 615.])
+    data_model = live_fit.data_model()
+    npt.assert_array_equal(data_model.times, [10., 11., 12., 13., 14.])
+    npt.assert_array_equal(data_model.CO2_concentrations, [550., 580., 600., 610., 615.])
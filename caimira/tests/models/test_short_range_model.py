@@ -68,6 +68,9 @@ def test_short_range_model_ndarray(concentration_model, short_range_model):
     assert isinstance(model._normed_diluted_jet_concentration(), np.ndarray)
     assert isinstance(model.diluted_jet_concentration(), np.ndarray)
     assert np.all(model.diluted_jet_concentration() > 0)
+    # The (time independent) dilution is computed once per model.
+    assert model.dilution_factor() is model.dilution_factor()
+    assert model._normed_diluted_jet_concentration() is model._normed_diluted_jet_concentration()
 
 
 @pytest.mark.parametrize(
@@ -129,6 +132,40 @@ def test_extract_between_bounds(short_range_model, time1, time2,
     )
 
 
+def test_overlap_durations(short_range_model):
+    model = short_range_model.build_model(1)
+    times = [10., 10.45, 10.7, 10.8, 10.9, 11.5, 12.]
+    np.testing.assert_allclose(
+        model.overlap_durations(times),
+        [stop - start for start, stop in (
+            model.extract_between_bounds(time1, time2) for time1, time2 in zip(times[:-1], times[1:]))],
+    )
+    with pytest.raises(ValueError, match='times must be in ascending order'):
+        model.overlap_durations([11., 10.])
+
+
+def test_deposited_exposure_between_times(exposure_model):
+    model = exposure_model.build_model(1_000)
+    times = [8.5, 10., 10.6, 10.8, 11.2, 12.5]
+    expected = []
+    for time1, time2 in zip(times[:-1], times[1:]):
+        # The reference, evaluated interaction by interaction.
+        interaction = model.short_range[0]
+        start, stop = interaction.extract_between_bounds(time1, time2)
+        # The short-range diameters are sampled: average over them first.
+        jet_exposure = np.mean(interaction._normed_jet_exposure_between_bounds(start, stop) *
+                               interaction.expiration.particle.fraction_deposited(evaporation_factor=1.0))
+        long_range_exposure = model.long_range_deposited_exposure_between_bounds(time1, time2)
+        expected.append(
+            jet_exposure * interaction.activity.inhalation_rate / interaction.dilution_factor() *
+            interaction.normalization_factor() / 10**6 -
+            long_range_exposure / interaction.dilution_factor() + long_range_exposure
+        )
+    np.testing.assert_allclose(model.deposited_exposure_between_times(times), expected, rtol=1e-12)
+    np.testing.assert_allclose(
+        model.deposited_exposure_between_bounds(10., 10.6), expected[1], rtol=1e-12)
+
+
 @pytest.mark.parametrize(
     "time, expected_short_range_concentration_component", [
         [8.5, 0.],
@@ -0,0 +1,114 @@
+import numpy as np
+import numpy.testing
+import pytest
+
+from caimira.calculator.models import models
+from caimira.calculator.models.dataclass_utils import replace_concentration_model_properties
+from caimira.calculator.models.sweep import scenario_mean, sweep, sweep_grid
+
+
+@pytest.fixture
+def diameter_dependent_exposure_model(data_registry):
+    # Samples of the diameter and viral load, as in a Monte-Carlo model.
+    diameters = np.linspace(1., 10., 20)
+    viral_loads = np.logspace(6., 10., 20)
+    infected = models.InfectedPopulation(
+        data_registry=data_registry,
+        number=1,
+        presence=models.SpecificInterval(((8., 12.), (13., 17.))),
+        virus=models.SARSCoV2(
+            viral_load_in_sputum=viral_loads,
+            infectious_dose=50.,
+            viable_to_RNA_ratio=0.5,
+            transmissibility_factor=1.,
+        ),
+        mask=models.Mask.types['Type I'],
+        activity=models.Activity.types['Seated'],
+        expiration=models.Expiration(diameter=diameters),
+        host_immunity=0.,
+    )
+    c_model = models.ConcentrationModel(
+        data_registry=data_registry,
+        room=models.Room(volume=75, inside_temp=models.PiecewiseConstant((0., 24.), (293,))),
+        ventilation=models.AirChange(
+            active=models.PeriodicInterval(period=120, duration=120),
+            air_exch=1.,
+        ),
+        infected=infected,
+        evaporation_factor=0.3,
+    )
+    return models.ExposureModel(
+        data_registry=data_registry,
+        concentration_model=(c_model,),
+        short_range=(),
+        exposed=models.Population(
+            number=10,
+            presence=infected.presence,
+            activity=models.Activity.types['Seated'],
+            mask=models.Mask.types['Type I'],
+            host_immunity=0.,
+        ),
+        geographical_data=models.Cases(),
+    )
+
+
+def test_sweep_matches_individual_scenarios(baseline_exposure_model):
+    air_exch = [0.5, 3., 30.]
+    swept = sweep(baseline_exposure_model, {
+        'concentration_model.ventilation.air_exch': air_exch,
+    })
+    probability = swept.individual_infection_probability()
+    assert probability.shape == (3, 1)
+
+    for i, value in enumerate(air_exch):
+        expected = replace_concentration_model_properties(
+            baseline_exposure_model, {'ventilation.air_exch': value},
+        ).individual_infection_probability()
+        np.testing.assert_allclose(probability[i], expected)
+
+
+def test_sweep_diameter_dependent(diameter_dependent_exposure_model):
+    volumes = [25., 75., 250.]
+    swept = sweep(diameter_dependent_exposure_model, {
+        'concentration_model.room.volume': volumes,
+    })
+    probability = swept.individual_infection_probability()
+    assert probability.shape == (3, 20)
+
+    for i, volume in enumerate(volumes):
+        model = replace_concentration_model_properties(
+            diameter_dependent_exposure_model, {'room.volume': volume},
+        )
+        np.testing.assert_allclose(probability[i], model.individual_infection_probability())
+        np.testing.assert_allclose(
+            swept.concentration(10.)[i], model.concentration(10.))
+    np.testing.assert_allclose(
+        scenario_mean(probability), probability.mean(axis=1))
+
+
+def test_sweep_exposed_parameter(baseline_exposure_model):
+    swept = sweep(baseline_exposure_model, {'exposed.host_immunity': [0., 0.5]})
+    probability = swept.individual_infection_probability()
+    assert probability.shape == (2, 1)
+    assert probability[1, 0] < probability[0, 0]
+
+
+def test_sweep_grid(baseline_exposure_model):
+    swept = sweep_grid(baseline_exposure_model, {
+        'concentration_model.ventilation.air_exch': [1., 10.],
+        'concentration_model.room.volume': [50., 100., 200.],
+    })
+    c_model = swept.concentration_model[0]
+    np.testing.assert_array_equal(
+        c_model.ventilation.air_exch.ravel(), [1., 1., 1., 10., 10., 10.])
+    np.testing.assert_array_equal(
+        c_model.room.volume.ravel(), [50., 100., 200., 50., 100., 200.])
+    assert scenario_mean(swept.individual_infection_probability()).shape == (6,)
+
+
+def test_sweep_inconsistent_scenarios(baseline_exposure_model):
+    with pytest.raises(ValueError, match="same number of scenarios"):
+        sweep(baseline_exposure_model, {
+            'concentration_model.ventilation.air_exch': [1., 10.],
+            'concentration_model.room.volume': [50., 100., 200.],
+        })
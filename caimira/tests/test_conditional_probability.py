@@ -81,6 +81,30 @@ def test_conditional_prob_inf_given_vl_dist(data_registry, baseline_exposure_mod
     assert np.allclose(actual_upper_percentiles, expected_upper_percentiles, atol=0.002)
 
 
+@pytest.mark.parametrize("step", [8/100, 0.5])
+def test_conditional_prob_inf_given_vl_dist_binning(step):
+    rng = np.random.default_rng(42)
+    specific_vl = rng.normal(6, 1.5, 20_000)
+    probability = rng.uniform(0, 1, 20_000)
+    # Includes an (empty) bin outside of the sampled viral loads.
+    viral_loads = np.append(np.arange(2, 10, step), 20.)
+
+    actual_pi_means, actual_lower_percentiles, actual_upper_percentiles = (
+        virus_report_data.conditional_prob_inf_given_vl_dist(probability, viral_loads, specific_vl, step)
+    )
+
+    for i, vl_log in enumerate(viral_loads):
+        specific_prob = probability[(vl_log - step/2 < specific_vl) & (specific_vl < vl_log + step/2)]
+        if specific_prob.size == 0:
+            assert np.isnan(actual_pi_means[i])
+            assert np.isnan(actual_lower_percentiles[i])
+            assert np.isnan(actual_upper_percentiles[i])
+            continue
+        np.testing.assert_allclose(actual_pi_means[i], specific_prob.mean())
+        np.testing.assert_allclose(actual_lower_percentiles[i], np.quantile(specific_prob, 0.05))
+        np.testing.assert_allclose(actual_upper_percentiles[i], np.quantile(specific_prob, 0.95))
+
+
 def test_probability_logic(baseline_exposure_model):
     """
     Test that the current logic for calculating the probability of infection 
@@ -96,3 +120,15 @@ def test_probability_logic(baseline_exposure_model):
 
     actual_pi = mc_model.individual_infection_probability() / 100
     assert np.allclose(expected_pi, actual_pi, atol=1e-14)
+
+
+def test_vl_scenarios_percentiles(baseline_exposure_model):
+    mc_model: models.ExposureModel = baseline_exposure_model.build_model(10_000)
+    scenarios = virus_report_data.calculate_vl_scenarios_percentiles(mc_model)['alternative_viral_load']
+    assert len(scenarios) == 7
+
+    for vl, probability in scenarios.items():
+        expected = dataclass_utils.replace_concentration_model_properties(
+            mc_model, {'infected.virus.viral_load_in_sputum': float(vl)},
+        ).individual_infection_probability()
+        np.testing.assert_allclose(probability, np.mean(expected), rtol=1e-8)
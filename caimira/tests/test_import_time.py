@@ -0,0 +1,48 @@
+import json
+import subprocess
+import sys
+
+import pytest
+
+
+#: Modules which are only needed by some computations (plots, kernel density
+#: samples, CO2 change points, ...), and must therefore not be imported up
+#: front. Note that scipy.stats (used by the Monte Carlo distributions) itself
+#: imports scipy.optimize and scipy.interpolate.
+HEAVY_MODULES = ('matplotlib', 'sklearn', 'pandas', 'scipy.signal')
+
+
+def import_in_subprocess(module: str) -> dict:
+    code = (
+        "import json, sys, time\n"
+        "start = time.perf_counter()\n"
+        f"import {module}\n"
+        "duration = time.perf_counter() - start\n"
+        f"print(json.dumps({{'duration': duration, 'modules': [m for m in {HEAVY_MODULES!r} if m in sys.modules]}}))\n"
+    )
+    output = subprocess.run([sys.executable, '-c', code], check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+@pytest.mark.parametrize(
+    "module, max_duration", [
+        ['caimira.calculator.models.models', 2.],
+        ['caimira.calculator.models.monte_carlo', 3.],
+        ['caimira.calculator.report.virus_report_data', 5.],
+        ['caimira.calculator.validators.co2.co2_validator', 5.],
+    ]
+)
+def test_import_time(module, max_duration):
+    result = import_in_subprocess(module)
+    assert result['modules'] == []
+    # A generous bound, catching the (re-)introduction of eager data loads.
+    assert result['duration'] < max_duration
+
+
+def test_lazy_geneva_temperatures():
+    from caimira.calculator.models import data
+
+    assert set(data.GenevaTemperatures) == set(data.GenevaTemperatures_hourly)
+    assert data.GenevaTemperatures['Jan'].transition_times[-1] == 24.
+    with pytest.raises(AttributeError):
+        data.not_a_data_attribute
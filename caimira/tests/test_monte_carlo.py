@@ -118,6 +118,14 @@ def test_build_exposure_model(baseline_mc_exposure_model: caimira.calculator.mod
     assert prob.shape == (7, )
 
 
+def test_build_exposure_model_float32(baseline_mc_exposure_model: caimira.calculator.models.monte_carlo.ExposureModel):
+    model = baseline_mc_exposure_model.build_model(7, np.float32)
+    assert model.concentration_model[0].room.volume.dtype == np.float32
+    prob = model.deposited_exposure()
+    assert prob.dtype == np.float64
+    assert prob.shape == (7, )
+
+
 def test_no_listed_mc_models(mc_exposure_model_with_concentration_model_list: caimira.calculator.models.monte_carlo.ExposureModel):
     with pytest.raises(TypeError, match="MCModelBase instances must be passed directly or as tuples to be " \
                                             "built into `caimira.models` objects, and not as list elements."):
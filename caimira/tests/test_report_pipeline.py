@@ -0,0 +1,68 @@
+import concurrent.futures
+import threading
+
+import pytest
+
+from caimira.calculator.report.report_pipeline import ReportPipeline, ReportStage
+
+
+@pytest.fixture
+def executor():
+    with concurrent.futures.ThreadPoolExecutor(4) as executor:
+        yield executor
+
+
+def test_pipeline_dependencies(executor):
+    completed = []
+    pipeline = ReportPipeline([
+        ReportStage('model', lambda: 2),
+        ReportStage('double', lambda model: model * 2, dependencies=('model',)),
+        ReportStage('square', lambda model: model ** 2, dependencies=('model',)),
+        ReportStage('total', lambda double, square: double + square, dependencies=('double', 'square')),
+    ])
+    result = pipeline.run(executor, on_stage_complete=lambda name, _: completed.append(name))
+    assert result.results == {'model': 2, 'double': 4, 'square': 4, 'total': 8}
+    assert set(result.timings) == set(result.results)
+    assert completed[0] == 'model' and completed[-1] == 'total'
+    assert result.skipped == ()
+
+
+def test_pipeline_concurrent_stages(executor):
+    # Both stages wait for each other: this only completes if they run concurrently.
+    barrier = threading.Barrier(2, timeout=5)
+    pipeline = ReportPipeline([
+        ReportStage('a', barrier.wait),
+        ReportStage('b', barrier.wait),
+    ])
+    assert set(pipeline.run(executor).results) == {'a', 'b'}
+
+
+def test_pipeline_skipped_stages(executor):
+    def fail():
+        raise AssertionError("Disabled stage was run")
+
+    pipeline = ReportPipeline([
+        ReportStage('model', lambda: 1),
+        ReportStage('plot', fail, enabled=False),
+        ReportStage('plot_data', lambda plot: plot, dependencies=('plot',)),
+    ])
+    result = pipeline.run(executor)
+    assert result.results == {'model': 1}
+    assert result.skipped == ('plot', 'plot_data')
+
+
+def test_pipeline_error(executor):
+    def fail(model):
+        raise ValueError("Stage failure")
+
+    pipeline = ReportPipeline([
+        ReportStage('model', lambda: 1),
+        ReportStage('failing', fail, dependencies=('model',)),
+    ])
+    with pytest.raises(ValueError, match="Stage failure"):
+        pipeline.run(executor)
+
+
+def test_pipeline_undeclared_dependency():
+    with pytest.raises(ValueError, match="undeclared"):
+        ReportPipeline([ReportStage('report', lambda model: model, dependencies=('model',))])
@@ -0,0 +1,51 @@
+import gc
+
+import numpy as np
+import numpy.testing
+
+from caimira.calculator.models import models
+from caimira.calculator.models.utils import identity_cache
+
+
+def test_identity_cache():
+    calls = []
+
+    @identity_cache
+    def scaled(values, factor):
+        calls.append(factor)
+        return values * factor
+
+    values = np.arange(5.)
+    result = scaled(values, 2.)
+    assert scaled(values, 2.) is result
+    # An equal, but distinct, array is not looked up by value.
+    numpy.testing.assert_array_equal(scaled(values.copy(), 2.), result)
+    scaled(values, 3.)
+    assert calls == [2., 2., 3.]
+    assert len(scaled.cache) == 2
+
+    # The entries are dropped with their arrays.
+    del values
+    gc.collect()
+    assert len(scaled.cache) == 0
+
+    # Calls with scalars only are not cached.
+    assert scaled(2., 2.) == 4.
+    assert scaled(2., 2.) == 4.
+    assert len(calls) == 5
+    assert len(scaled.cache) == 0
+
+
+def test_diameter_quantities_shared():
+    diameter = np.array([0.3, 0.7, 1.5, 4., 12.])
+    expiration = models.Expiration(diameter=diameter)
+    particle = models.Particle(diameter=diameter)
+    mask = models.Mask.types['Type I']
+
+    assert particle.fraction_deposited() is expiration.particle.fraction_deposited()
+    assert mask.exhale_efficiency(diameter) is models.Mask(η_inhale=0.3).exhale_efficiency(diameter)
+    assert expiration.aerosols(mask) is models.Expiration(diameter=diameter).aerosols(mask)
+    numpy.testing.assert_allclose(
+        expiration.aerosols(mask),
+        np.pi * diameter**3 / 6. * (1 - mask.exhale_efficiency(diameter)) * 1e-12,
+    )
@@ -11,9 +11,12 @@ import functools
 import html
 import json
 import importlib.metadata
+import multiprocessing
+import multiprocessing.managers
 from pprint import pformat
 import os
 from pathlib import Path
+from queue import Empty
 import traceback
 import typing
 import uuid
@@ -29,12 +32,15 @@ from caimira.calculator.models.profiler import CaimiraProfiler, Profilers
 from caimira.calculator.store.data_registry import DataRegistry
 from caimira.calculator.store.data_service import DataService
 
-from caimira.api.controller import virus_report_controller, co2_report_controller
-from caimira.calculator.report.virus_report_data import calculate_report_data
+from caimira.api.controller import virus_report_controller, co2_report_controller, report_serializer
+from caimira.calculator.report.virus_report_data import PLOT_FORMATS, calculate_report_data
 from caimira.calculator.validators.virus import virus_validator
 
-from . import markdown_tools
-from .report.virus_report import VirusReportGenerator
+from . import markdown_tools, report_jobs
+from .admission import AdmissionController
+from .warmup import warm_up_worker
+from .report_jobs import ReportJobStore
+from .report.virus_report import VirusReportGenerator, stream_report_stages
 from ..calculator.report.co2_report import CO2ReportGenerator
 from .user import AuthenticatedUser, AnonymousUser
 
@@ -121,6 +127,22 @@ class BaseRequestHandler(RequestHandler):
                 method=self.request.method,
             )
 
+    def admit_report_task(self) -> bool:
+        """
+        Check that a new report task can be admitted to the worker pool.
+        If not, the request is finished with a 503 or 429 status and a
+        Retry-After header, and False is returned.
+        """
+        admission: AdmissionController = self.settings['report_executor']
+        rejection = admission.check_admission()
+        if rejection is None:
+            return True
+        LOG.warning(f'Report request rejected ({rejection.status_code}): {rejection.reason}')
+        self.set_status(rejection.status_code)
+        self.set_header('Retry-After', str(rejection.retry_after))
+        self.finish({'code': rejection.status_code, 'error': rejection.reason})
+        return False
+
     def write_error(self, status_code: int, **kwargs) -> None:
         template = self.settings["template_environment"].get_template(
             "error.html.j2")
@@ -182,10 +204,9 @@ class ConcentrationModel(BaseRequestHandler):
 
         base_url = self.request.protocol + "://" + self.request.host
         report_generator: VirusReportGenerator = self.settings['report_generator']
-        executor = loky.get_reusable_executor(
-            max_workers=self.settings['handler_worker_pool_size'],
-            timeout=300,
-        )
+        if not self.admit_report_task():
+            return
+        executor: AdmissionController = self.settings['report_executor']
         # Re-generate the report with the conditional probability of infection plot
         if self.get_cookie('conditional_plot'):
             form.conditional_probability_viral_loads = True if self.get_cookie('conditional_plot') == '1' else False
@@ -213,7 +234,9 @@ class ConcentrationModelJsonResponse(BaseRequestHandler):
     async def post(self) -> None:
         """
         Expects algorithm input in HTTP POST request body in JSON format.
-        Returns report data (algorithm output) in HTTP POST response body in JSON format.
+        Returns report data (algorithm output) in HTTP POST response body in JSON format,
+        or in MessagePack format if requested through the ``Accept`` header.
+        The model representation is only included with ``?include_model=1``.
         """
         debug = self.settings.get("debug", False)
 
@@ -234,17 +257,197 @@ class ConcentrationModelJsonResponse(BaseRequestHandler):
             await self.finish(json.dumps(response_json))
             return
 
-        executor = loky.get_reusable_executor(
-            max_workers=self.settings['handler_worker_pool_size'],
-            timeout=300,
-        )
+        if not self.admit_report_task():
+            return
+        executor: AdmissionController = self.settings['report_executor']
         report_data_task = executor.submit(calculate_report_data, form,
                                            executor_factory=functools.partial(
                                                concurrent.futures.ThreadPoolExecutor,
                                                self.settings['report_generation_parallelism'],
                                            ),)
         report_data: dict = await asyncio.wrap_future(report_data_task)
-        await self.finish(report_data)
+        report_data = virus_report_controller.strip_models(
+            report_data, include_model_repr=self.get_argument('include_model', '0') == '1')
+        body, content_type = report_serializer.encode(
+            report_data, report_serializer.negotiate_format(self.request.headers.get('Accept')))
+        self.set_header('Content-Type', content_type)
+        await self.finish(body)
+
+
+def _stripped_report_data(form: virus_validator.VirusFormData,
+                          executor_factory: typing.Callable[[], concurrent.futures.Executor],
+                          include_model_repr: bool = False) -> dict:
+    # The models are stripped in the worker, rather than sent back to the handler.
+    return virus_report_controller.strip_models(
+        calculate_report_data(form, executor_factory), include_model_repr)
+
+
+class ReportJobs(BaseRequestHandler):
+    def check_xsrf_cookie(self):
+        """
+        As for ConcentrationModelJsonResponse, this stateless API does not use XSRF cookies.
+        """
+        pass
+
+    async def post(self) -> None:
+        """
+        Expects algorithm input in HTTP POST request body in JSON format.
+        Submits the report computation to the worker pool, and returns
+        (with status 202) the id of the job, and the URL at which its status
+        and result can be retrieved. With ``?format=html`` the job generates
+        the HTML report, otherwise the report data.
+        """
+        data_registry: DataRegistry = self.settings["data_registry"]
+        data_service: typing.Optional[DataService] = self.settings.get("data_service", None)
+        if data_service:
+            data_service.update_registry(data_registry)
+
+        try:
+            requested_model_config = json.loads(self.request.body)
+            LOG.debug(pformat(requested_model_config))
+            form = virus_report_controller.generate_form_obj(requested_model_config, data_registry)
+        except Exception as err:
+            LOG.exception(err)
+            response_json = {'code': 400, 'error': f'Your request was invalid {html.escape(str(err))}'}
+            self.set_status(400)
+            await self.finish(json.dumps(response_json))
+            return
+
+        if not self.admit_report_task():
+            return
+        executor: AdmissionController = self.settings['report_executor']
+        executor_factory = functools.partial(
+            concurrent.futures.ThreadPoolExecutor,
+            self.settings['report_generation_parallelism'],
+        )
+        job_store: ReportJobStore = self.settings['report_jobs']
+        if self.get_argument('format', 'json') == 'html':
+            base_url = self.request.protocol + "://" + self.request.host
+            job = job_store.submit(
+                executor, 'html', self.settings['report_generator'].build_report,
+                base_url, form, executor_factory=executor_factory,
+            )
+        else:
+            job = job_store.submit(
+                executor, 'json', _stripped_report_data, form, executor_factory,
+                include_model_repr=self.get_argument('include_model', '0') == '1',
+            )
+
+        status_url = self.settings['template_environment'].globals['get_calculator_url'](f'/report/jobs/{job.job_id}')
+        self.set_status(202)
+        self.set_header('Location', status_url)
+        await self.finish({'job_id': job.job_id, 'status': job.status, 'status_url': status_url})
+
+
+class ReportJobStatus(BaseRequestHandler):
+    async def get(self, job_id: str) -> None:
+        """
+        Returns the status of the job while it is pending or running (with
+        status 202), its result once done, or its error if it failed.
+        """
+        job_store: ReportJobStore = self.settings['report_jobs']
+        job = job_store.get(job_id)
+        if job is None:
+            self.set_status(404)
+            await self.finish({'job_id': job_id, 'error': 'Unknown (or expired) report job'})
+            return
+
+        status = job.status
+        if status in (report_jobs.PENDING, report_jobs.RUNNING):
+            self.set_status(202)
+            await self.finish({'job_id': job_id, 'status': status})
+        elif status == report_jobs.ERROR:
+            LOG.error(f'Report job {job_id} failed: {job.error()}')
+            self.set_status(500)
+            await self.finish({'job_id': job_id, 'status': status, 'error': job.error()})
+        elif job.kind == 'html':
+            await self.finish(job.result())
+        else:
+            body, content_type = report_serializer.encode(
+                job.result(), report_serializer.negotiate_format(self.request.headers.get('Accept')))
+            self.set_header('Content-Type', content_type)
+            await self.finish(body)
+
+
+@functools.lru_cache(maxsize=None)
+def _stream_manager() -> multiprocessing.managers.SyncManager:
+    """
+    The (lazily started) manager process holding the queues through which
+    the report workers stream their stages back to the handlers.
+    """
+    return multiprocessing.Manager()
+
+
+class ConcentrationModelStream(BaseRequestHandler):
+    #: The interval (s) at which the worker is checked for, while waiting for a stage.
+    poll_interval: float = 1.
+
+    def check_xsrf_cookie(self):
+        """
+        As for ConcentrationModelJsonResponse, this stateless API does not use XSRF cookies.
+        """
+        pass
+
+    async def post(self) -> None:
+        """
+        Expects algorithm input in HTTP POST request body in JSON format.
+        Streams the report data stage by stage, as soon as each stage is
+        complete: first the core results (probability of infection, expected
+        new cases and concentrations), then the alternative scenarios and
+        the (optional) conditional probability data. The events are sent as
+        Server-Sent Events if requested through the ``Accept`` header, or as
+        newline-delimited JSON otherwise.
+        """
+        data_registry: DataRegistry = self.settings["data_registry"]
+        data_service: typing.Optional[DataService] = self.settings.get("data_service", None)
+        if data_service:
+            data_service.update_registry(data_registry)
+
+        requested_model_config = json.loads(self.request.body)
+        LOG.debug(pformat(requested_model_config))
+
+        try:
+            form = virus_report_controller.generate_form_obj(requested_model_config, data_registry)
+        except Exception as err:
+            LOG.exception(err)
+            response_json = {'code': 400, 'error': f'Your request was invalid {html.escape(str(err))}'}
+            self.set_status(400)
+            await self.finish(json.dumps(response_json))
+            return
+
+        if not self.admit_report_task():
+            return
+        executor: AdmissionController = self.settings['report_executor']
+
+        stream_format = report_serializer.negotiate_stream_format(self.request.headers.get('Accept'))
+        self.set_header('Content-Type', report_serializer.SSE_CONTENT_TYPE if stream_format == 'sse'
+                        else report_serializer.NDJSON_CONTENT_TYPE)
+        self.set_header('Cache-Control', 'no-cache')
+        queue = _stream_manager().Queue()
+        report_task = executor.submit(
+            stream_report_stages, self.settings['report_generator'], form,
+            executor_factory=functools.partial(
+                concurrent.futures.ThreadPoolExecutor,
+                self.settings['report_generation_parallelism'],
+            ),
+            queue=queue,
+        )
+        stage = None
+        while stage not in ('done', 'error'):
+            stage, data = await asyncio.get_running_loop().run_in_executor(
+                None, self._next_stage, queue, report_task)
+            self.write(report_serializer.encode_event(stage, data, stream_format))
+            await self.flush()
+        await self.finish()
+
+    def _next_stage(self, queue, report_task: concurrent.futures.Future) -> typing.Tuple[str, typing.Any]:
+        while True:
+            try:
+                return queue.get(timeout=self.poll_interval)
+            except Empty:
+                # The worker only exits without a final stage if it crashed.
+                if report_task.done() and queue.empty():
+                    return 'error', {'error': f'The report generation failed: {report_task.exception()!r}'}
 
 
 class StaticModel(BaseRequestHandler):
@@ -260,7 +463,9 @@ class StaticModel(BaseRequestHandler):
 
         base_url = self.request.protocol + "://" + self.request.host
         report_generator: VirusReportGenerator = self.settings['report_generator']
-        executor = loky.get_reusable_executor(max_workers=self.settings['handler_worker_pool_size'])
+        if not self.admit_report_task():
+            return
+        executor: AdmissionController = self.settings['report_executor']
 
         report_task = executor.submit(
             report_generator.build_report, base_url, form,
@@ -323,6 +528,13 @@ class CompressedCalculatorFormInputs(BaseRequestHandler):
         self.redirect(f'{template_environment.globals["get_calculator_url"]()}?{args}')
 
 
+class AdmissionMetrics(BaseRequestHandler):
+    def get(self) -> None:
+        """The queue depth, wait and service time metrics of the report worker pool."""
+        admission: AdmissionController = self.settings['report_executor']
+        self.finish(admission.metrics())
+
+
 class ArveData(BaseRequestHandler):
     async def get(self, hotel_id, floor_id):
         client_id = self.settings["arve_client_id"]
@@ -410,21 +622,29 @@ class CO2ModelResponse(BaseRequestHandler):
             self.finish(json.dumps(response_json))
             return
 
+        # With render=0, only the data (transition times and plot series) is
+        # returned, for client side charting: the plot is not rendered.
+        render = self.get_argument('render', '1') != '0'
+        plot_format = self.get_argument('plot_format', 'png')
+        if plot_format not in PLOT_FORMATS:
+            self.set_status(400)
+            self.finish({'code': 400, 'error': f'Unsupported plot format {html.escape(plot_format)}'})
+            return
+
+        # Both the initial plot (change point detection and plot) and the fit
+        # run in the worker pool, rather than blocking the IOLoop.
+        if not self.admit_report_task():
+            return
         CO2_report_generator: CO2ReportGenerator = CO2ReportGenerator()
         if endpoint.rstrip('/') == 'plot':
-            report = CO2_report_generator.build_initial_plot(form)
-            self.finish(report)
+            build_report = CO2_report_generator.build_initial_plot
         else:
-            executor = loky.get_reusable_executor(
-                max_workers=self.settings['handler_worker_pool_size'],
-                timeout=300,
-            )
-            report_task = executor.submit(
-                CO2_report_generator.build_fitting_results, form,
-            )
+            build_report = CO2_report_generator.build_fitting_results
+        executor: AdmissionController = self.settings['report_executor']
+        report_task = executor.submit(build_report, form, render=render, plot_format=plot_format)
 
-            report = await asyncio.wrap_future(report_task)
-            self.finish(report)
+        report = await asyncio.wrap_future(report_task)
+        self.finish(report)
 
 
 def get_url(app_root: str, relative_path: str = '/'):
@@ -457,7 +677,11 @@ def make_app(
     urls: typing.List = base_urls + [
         (get_root_url(r'/_c/(.*)'), CompressedCalculatorFormInputs),
         (get_root_calculator_url(r'/report-json'), ConcentrationModelJsonResponse),
+        (get_root_calculator_url(r'/report-stream'), ConcentrationModelStream),
+        (get_root_calculator_url(r'/report/jobs'), ReportJobs),
+        (get_root_calculator_url(r'/report/jobs/([0-9a-f]+)'), ReportJobStatus),
         (get_root_calculator_url(r'/baseline-model/result'), StaticModel),
+        (get_root_calculator_url(r'/metrics'), AdmissionMetrics),
         (get_root_calculator_url(r'/api/arve/v1/(.*)/(.*)'), ArveData),
         # Generic Pages
         (get_root_url(r'/expert-app'), GenericExtraPage, {
@@ -520,6 +744,40 @@ def make_app(
 
     if data_service_enabled: data_service = DataService.create()
 
+    # Process parallelism controls. There is a balance between serving a single report
+    # requests quickly or serving multiple requests concurrently.
+    # The defaults are: handle one report at a time, and allow parallelism
+    # of that report generation. A value of ``None`` will result in the number of
+    # processes being determined based on the number of CPUs. For some deployments,
+    # such as on OpenShift this number does *not* reflect the real number of CPUs that
+    # can be used, and it is recommended to specify these values explicitly (through
+    # the environment variables).
+    handler_worker_pool_size = int(os.environ.get("HANDLER_WORKER_POOL_SIZE", 1)) or None
+
+    # The reports waiting for a worker are limited to REPORT_QUEUE_DEPTH, and
+    # to an expected queue time of REPORT_QUEUE_SLO seconds (0 to disable).
+    queue_time_slo = float(os.environ.get('REPORT_QUEUE_SLO', 120))
+    # The workers are warmed up on start (unless WORKER_WARM_UP=0), and reaped
+    # after being idle for 5 minutes. With HANDLER_WORKER_MIN_WARM > 0, the
+    # workers are started with the application and never reaped: loky keeps
+    # either all or none of its idle workers, hence all the pool is kept warm.
+    worker_warm_up = bool(int(os.environ.get('WORKER_WARM_UP', 1)))
+    keep_workers_warm = int(os.environ.get('HANDLER_WORKER_MIN_WARM', 0)) > 0
+    report_executor = AdmissionController(
+        executor_factory=functools.partial(
+            loky.get_reusable_executor, max_workers=handler_worker_pool_size,
+            timeout=None if keep_workers_warm else 300,
+            initializer=warm_up_worker if worker_warm_up else None,
+        ),
+        max_workers=handler_worker_pool_size or loky.cpu_count(),
+        max_queue_depth=int(os.environ.get('REPORT_QUEUE_DEPTH', 20)),
+        queue_time_slo=queue_time_slo or None,
+    )
+    if keep_workers_warm:
+        # Spawn (and warm up) the workers now, rather than on the first request:
+        # loky only starts its workers with the first (here no-op) task.
+        report_executor.executor_factory().submit(int)
+
     return Application(
         urls,
         debug=debug,
@@ -527,8 +785,16 @@ def make_app(
         data_service=data_service,
         template_environment=template_environment,
         default_handler_class=Missing404Handler,
-        report_generator=VirusReportGenerator(loader, get_root_url, get_root_calculator_url),
+        report_generator=VirusReportGenerator(
+            loader, get_root_url, get_root_calculator_url,
+            # Optionally, the compiled report templates are cached on disk.
+            bytecode_cache_directory=os.environ.get('REPORT_TEMPLATE_CACHE_DIR') or None,
+        ),
+        # The completed report jobs are kept for REPORT_JOBS_TTL seconds.
+        report_jobs=ReportJobStore(ttl=float(os.environ.get('REPORT_JOBS_TTL', 3600))),
         xsrf_cookies=True,
+        # gzip the (HTML and JSON) responses for clients which accept it
+        compress_response=True,
         # COOKIE_SECRET being undefined will result in no login information being
         # presented to the user.
         cookie_secret=os.environ.get('COOKIE_SECRET', '<undefined>'),
@@ -536,17 +802,9 @@ def make_app(
         arve_client_secret=os.environ.get('ARVE_CLIENT_SECRET', None),
         arve_api_key=os.environ.get('ARVE_API_KEY', None),
 
-        # Process parallelism controls. There is a balance between serving a single report
-        # requests quickly or serving multiple requests concurrently.
-        # The defaults are: handle one report at a time, and allow parallelism
-        # of that report generation. A value of ``None`` will result in the number of
-        # processes being determined based on the number of CPUs. For some deployments,
-        # such as on OpenShift this number does *not* reflect the real number of CPUs that
-        # can be used, and it is recommended to specify these values explicitly (through
-        # the environment variables).
-        handler_worker_pool_size=(
-            int(os.environ.get("HANDLER_WORKER_POOL_SIZE", 1)) or None
-        ),
+        handler_worker_pool_size=handler_worker_pool_size,
+        # The (admission controlled) pool of workers generating the reports.
+        report_executor=report_executor,
         report_generation_parallelism=(
             int(os.environ.get('REPORT_PARALLELISM', 0)) or None
         ),
@@ -0,0 +1,173 @@
+"""
+Admission control for the (bounded) pool of report workers.
+
+The report computations are queued in front of a fixed number of worker
+processes. Rather than letting the queue grow without limit (until the
+requests time out at the proxy), the AdmissionController rejects a new
+request when:
+
+* the queue is full (``max_queue_depth``): 503 Service Unavailable;
+* the expected time in the queue exceeds the queue-time SLO
+  (``queue_time_slo``), based on the observed service times: 429 Too Many
+  Requests.
+
+In both cases a ``Retry-After`` estimate is given. The queue depth, the
+wait (queue) and service times are recorded, and exposed by metrics().
+
+"""
+import collections
+import concurrent.futures
+import dataclasses
+import math
+import threading
+import time
+import typing
+
+
+def _timed_call(fn: typing.Callable[..., typing.Any], args: tuple, kwargs: dict) -> typing.Tuple[float, float, typing.Any]:
+    # Runs in the worker: the wall-clock time is comparable with the handler's on the same host.
+    start = time.time()
+    result = fn(*args, **kwargs)
+    return start, time.time(), result
+
+
+@dataclasses.dataclass(frozen=True)
+class Rejection:
+    #: The HTTP status code of the response (503 or 429).
+    status_code: int
+
+    #: A human readable reason.
+    reason: str
+
+    #: The number of seconds after which the client may retry.
+    retry_after: int
+
+
+class _AdmittedFuture(concurrent.futures.Future):
+    """The future of an admitted task, running as soon as the underlying task runs."""
+    def __init__(self, inner: concurrent.futures.Future):
+        super().__init__()
+        self._inner = inner
+
+    def running(self) -> bool:
+        return not self.done() and self._inner.running()
+
+    def cancel(self) -> bool:
+        return self._inner.cancel() and super().cancel()
+
+
+class AdmissionController(concurrent.futures.Executor):
+    def __init__(
+            self,
+            executor_factory: typing.Callable[[], concurrent.futures.Executor],
+            max_workers: int,
+            max_queue_depth: int = 20,
+            queue_time_slo: typing.Optional[float] = 120.,
+            history_size: int = 1000,
+    ):
+        #: Returns the underlying executor, e.g. the reusable loky executor.
+        self.executor_factory = executor_factory
+        #: The number of workers of the underlying executor.
+        self.max_workers = max_workers
+        #: The maximum number of tasks waiting for a worker.
+        self.max_queue_depth = max_queue_depth
+        #: The maximum expected queue time (s) of an admitted task, or None.
+        self.queue_time_slo = queue_time_slo
+
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._admitted = 0
+        self._rejected: typing.Dict[int, int] = collections.Counter()
+        self._wait_times: typing.Deque[float] = collections.deque(maxlen=history_size)
+        self._service_times: typing.Deque[float] = collections.deque(maxlen=history_size)
+
+    @property
+    def queue_depth(self) -> int:
+        """The number of tasks (estimated to be) waiting for a worker."""
+        return max(0, self._in_flight - self.max_workers)
+
+    def expected_wait_time(self) -> float:
+        """
+        The expected queue time (s) of a new task, given the tasks in flight
+        and the mean of the recent service times.
+        """
+        if not self._service_times or self._in_flight < self.max_workers:
+            return 0.
+        mean_service_time = sum(self._service_times) / len(self._service_times)
+        # The tasks ahead of the new one are processed max_workers at a time.
+        return math.ceil((self._in_flight - self.max_workers + 1) / self.max_workers) * mean_service_time
+
+    def check_admission(self) -> typing.Optional[Rejection]:
+        """
+        Return None if a new task can be admitted, or the reason for which
+        it should be rejected.
+        """
+        with self._lock:
+            expected_wait = self.expected_wait_time()
+            rejection = None
+            if self.queue_depth >= self.max_queue_depth:
+                rejection = Rejection(
+                    503, f'The report queue is full ({self.queue_depth} waiting)',
+                    retry_after=max(1, math.ceil(expected_wait)),
+                )
+            elif self.queue_time_slo is not None and expected_wait > self.queue_time_slo:
+                rejection = Rejection(
+                    429, f'The expected queue time ({expected_wait:.0f} s) exceeds {self.queue_time_slo:.0f} s',
+                    retry_after=max(1, math.ceil(expected_wait - self.queue_time_slo)),
+                )
+            if rejection is not None:
+                self._rejected[rejection.status_code] += 1
+            return rejection
+
+    def submit(self, fn, /, *args, **kwargs) -> concurrent.futures.Future:
+        """
+        Submit the task to the underlying executor, recording its queue and
+        service times. The admission should have been checked beforehand.
+        """
+        submitted = time.time()
+        with self._lock:
+            self._in_flight += 1
+            self._admitted += 1
+        inner = self.executor_factory().submit(_timed_call, fn, args, kwargs)
+        outer = _AdmittedFuture(inner)
+
+        def on_done(inner: concurrent.futures.Future):
+            with self._lock:
+                self._in_flight -= 1
+            if inner.cancelled():
+                return
+            if inner.exception() is not None:
+                outer.set_exception(inner.exception())
+                return
+            start, stop, result = inner.result()
+            with self._lock:
+                self._wait_times.append(max(0., start - submitted))
+                self._service_times.append(stop - start)
+            outer.set_result(result)
+
+        inner.add_done_callback(on_done)
+        return outer
+
+    def metrics(self) -> typing.Dict[str, typing.Any]:
+        def summary(times: typing.Sequence[float]) -> typing.Dict[str, typing.Optional[float]]:
+            ordered = sorted(times)
+            return {
+                'count': len(ordered),
+                'mean': sum(ordered) / len(ordered) if ordered else None,
+                'p95': ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))] if ordered else None,
+                'max': ordered[-1] if ordered else None,
+            }
+
+        with self._lock:
+            return {
+                'max_workers': self.max_workers,
+                'in_flight': self._in_flight,
+                'queue_depth': self.queue_depth,
+                'max_queue_depth': self.max_queue_depth,
+                'queue_time_slo': self.queue_time_slo,
+                'expected_wait_time': self.expected_wait_time(),
+                'admitted': self._admitted,
+                'rejected': {str(code): count for code, count in self._rejected.items()},
+                'wait_time': summary(self._wait_times),
+                'service_time': summary(self._service_times),
+            }
@@ -6,9 +6,9 @@ from caimira.calculator.validators.co2.co2_validator import CO2FormData
 @dataclasses.dataclass
 class CO2ReportGenerator:
     
-    def build_initial_plot(self, form: CO2FormData):
-        return co2_rep_data.build_initial_plot(form=form)
+    def build_initial_plot(self, form: CO2FormData, render: bool = True, plot_format: str = 'png'):
+        return co2_rep_data.build_initial_plot(form=form, render=render, plot_format=plot_format)
     
-    def build_fitting_results(self, form: CO2FormData):
-        return co2_rep_data.build_fitting_results(form=form)
+    def build_fitting_results(self, form: CO2FormData, render: bool = True, plot_format: str = 'png'):
+        return co2_rep_data.build_fitting_results(form=form, render=render, plot_format=plot_format)
     
\ No newline at end of file
@@ -3,6 +3,7 @@ import dataclasses
 
 import concurrent.futures
 import json
+import threading
 import typing
 import jinja2
 import urllib
@@ -12,9 +13,14 @@ import numpy as np
 
 from .. import markdown_tools
 
+from caimira.api.controller import report_serializer
+from caimira.api.controller.virus_report_controller import strip_models
 from caimira.calculator.models import models
 from caimira.calculator.validators.virus.virus_validator import VirusFormData
-from caimira.calculator.report.virus_report_data import alternative_scenarios_data, calculate_report_data, calculate_vl_scenarios_percentiles
+from caimira.calculator.report.virus_report_data import (
+    alternative_scenarios_data, calculate_report_data, calculate_vl_scenarios_percentiles, conditional_probability_results,
+)
+from caimira.calculator.report.report_pipeline import PipelineResult, ReportPipeline, ReportStage
 
 
 def minutes_to_time(minutes: int) -> str:
@@ -84,11 +90,28 @@ def generate_permalink(base_url, get_root_url,  get_root_calculator_url, form: V
     }
 
 
+#: The report template environments of this process, by loader (and bytecode
+#: cache directory). See VirusReportGenerator.template_environment.
+_TEMPLATE_ENVIRONMENTS: typing.Dict[typing.Hashable, jinja2.Environment] = {}
+_TEMPLATE_ENVIRONMENTS_LOCK = threading.Lock()
+
+
+def _loader_key(loader: jinja2.BaseLoader) -> typing.Hashable:
+    if isinstance(loader, jinja2.FileSystemLoader):
+        # The loader is pickled (along with the report generator) to the
+        # report workers, hence identified by value rather than identity.
+        return (type(loader), tuple(loader.searchpath), loader.encoding, loader.followlinks)
+    return loader
+
+
 @dataclasses.dataclass
 class VirusReportGenerator:
     jinja_loader: jinja2.BaseLoader
     get_root_url: typing.Any
     get_root_calculator_url: typing.Any
+    #: If given, the compiled templates are also cached (as Python bytecode)
+    #: in this directory, and shared by all the processes using it.
+    bytecode_cache_directory: typing.Optional[str] = None
 
     def build_report(
             self,
@@ -100,6 +123,61 @@ class VirusReportGenerator:
             base_url, form, executor_factory=executor_factory)
         return self.render(context)
 
+    def report_pipeline(
+            self,
+            form: VirusFormData,
+            executor_factory: typing.Callable[[], concurrent.futures.Executor],
+    ) -> ReportPipeline:
+        """
+        The stages of the report computation. The conditional probability
+        and the alternative scenarios only depend on the model (and the
+        core results), hence run concurrently with the other stages.
+        """
+        def conditional_probability(model: models.ExposureModelGroup):
+            return {
+                single_group.identifier: conditional_probability_results(form, single_group)
+                for single_group in model.exposure_models
+            }
+
+        return ReportPipeline([
+            ReportStage('model', form.build_model),
+            ReportStage(
+                'report_data',
+                lambda model: calculate_report_data(
+                    form, executor_factory, model_group=model, include_conditional_probability=False),
+                dependencies=('model',),
+            ),
+            ReportStage(
+                'conditional_probability', conditional_probability,
+                dependencies=('model',),
+                enabled=form.conditional_probability_viral_loads,
+            ),
+            # Alternative viral load data
+            ReportStage(
+                'alternative_viral_load',
+                lambda model: calculate_vl_scenarios_percentiles(model.exposure_models[0]),
+                dependencies=('model',),
+                enabled=form.conditional_probability_viral_loads,
+            ),
+            # Alternative scenarios data (only generated in the legacy version - when occupancy input is empty)
+            ReportStage(
+                'alternative_scenarios',
+                lambda report_data: alternative_scenarios_data(form, report_data, executor_factory),
+                dependencies=('report_data',),
+                enabled=not form.occupancy,
+            ),
+        ])
+
+    def run_pipeline(
+            self,
+            form: VirusFormData,
+            executor_factory: typing.Callable[[], concurrent.futures.Executor],
+            on_stage_complete: typing.Optional[typing.Callable[[str, typing.Any], None]] = None,
+    ) -> PipelineResult:
+        pipeline = self.report_pipeline(form, executor_factory)
+        with concurrent.futures.ThreadPoolExecutor(len(pipeline.stages)) as stage_executor:
+            return pipeline.run(stage_executor, on_stage_complete)
+
     def prepare_context(
             self,
             base_url: str,
@@ -114,23 +192,21 @@ class VirusReportGenerator:
             'creation_date': time,
         }
 
+        result = self.run_pipeline(form, executor_factory)
+
         # Main report data
-        report_data = calculate_report_data(form, executor_factory)
+        report_data = result.results['report_data']
         context.update(report_data)
+        for identifier, conditional_data in result.results.get('conditional_probability', {}).items():
+            context['groups'][identifier].update(conditional_data)
+        for stage in ('alternative_scenarios', 'alternative_viral_load'):
+            context.update(result.results.get(stage, {}))
+        context['stage_timings'] = result.timings
 
         # Model and Data Registry
         model: models.ExposureModel = report_data['model']
         data_registry_version: typing.Optional[str] = f"v{model.data_registry.version}" if model.data_registry.version else None
 
-        # Alternative scenarios data (only generated in the legacy version - when occupancy input is empty)
-        if not form.occupancy:
-            context.update(alternative_scenarios_data(form, report_data, executor_factory)) 
-
-        # Alternative viral load data
-        if form.conditional_probability_viral_loads:
-            alternative_viral_load: typing.Dict[str,typing.Any] = calculate_vl_scenarios_percentiles(model)
-            context.update(alternative_viral_load)
-
         # Permalink
         permalink: typing.Dict[str, str] = generate_permalink(
             base_url, self.get_root_url, self.get_root_calculator_url, form)
@@ -147,9 +223,13 @@ class VirusReportGenerator:
         return context
 
     def _template_environment(self) -> jinja2.Environment:
+        bytecode_cache = None
+        if self.bytecode_cache_directory is not None:
+            bytecode_cache = jinja2.FileSystemBytecodeCache(self.bytecode_cache_directory)
         env = jinja2.Environment(
             loader=self.jinja_loader,
             undefined=jinja2.StrictUndefined,
+            bytecode_cache=bytecode_cache,
         )
         env.globals["common_text"] = markdown_tools.extract_rendered_markdown_blocks(
             env.get_template('common_text.md.j2')
@@ -162,8 +242,63 @@ class VirusReportGenerator:
         env.filters['int_format'] = "{:0.0f}".format
         env.filters['percentage'] = percentage
         env.filters['JSONify'] = json.dumps
+        # Compile the report template up front.
+        env.get_template("calculator.report.html.j2")
         return env
 
+    def template_environment(self) -> jinja2.Environment:
+        """
+        The environment of the report templates, with the common text
+        blocks already rendered. It is built once per process (and loader):
+        the compiled templates are then kept in its cache.
+        """
+        key = (_loader_key(self.jinja_loader), self.bytecode_cache_directory)
+        with _TEMPLATE_ENVIRONMENTS_LOCK:
+            if key not in _TEMPLATE_ENVIRONMENTS:
+                _TEMPLATE_ENVIRONMENTS[key] = self._template_environment()
+            return _TEMPLATE_ENVIRONMENTS[key]
+
     def render(self, context: dict) -> str:
-        template = self._template_environment().get_template("calculator.report.html.j2")
+        template = self.template_environment().get_template("calculator.report.html.j2")
         return template.render(**context, text_blocks=template.globals["common_text"])
+
+
+def stream_stage_data(stage: str, data: typing.Any) -> typing.Optional[typing.Dict[str, typing.Any]]:
+    """
+    The (serializable) part of the result of a report stage which is
+    streamed to the client, or None if the stage is not streamed.
+    """
+    if stage == 'model':
+        return None
+    if stage == 'report_data':
+        # The report data is still used by the dependent stages: strip a copy.
+        data = dict(data, groups={
+            identifier: dict(group) for identifier, group in data['groups'].items()
+        })
+        data = strip_models(data)
+    return report_serializer.to_serializable(data)
+
+
+def stream_report_stages(
+        report_generator: VirusReportGenerator,
+        form: VirusFormData,
+        executor_factory: typing.Callable[[], concurrent.futures.Executor],
+        queue: typing.Any,
+) -> None:
+    """
+    Compute the report stages, putting a ``(stage, data)`` tuple onto the
+    given queue as soon as each stage completes (see stream_stage_data).
+    The last item is either ``("done", {"stage_timings": ...})`` or
+    ``("error", {"error": ...})``.
+    """
+    def on_stage_complete(stage: str, data: typing.Any):
+        stage_data = stream_stage_data(stage, data)
+        if stage_data is not None:
+            queue.put((stage, stage_data))
+
+    try:
+        result = report_generator.run_pipeline(form, executor_factory, on_stage_complete)
+    except Exception as err:
+        queue.put(('error', {'error': str(err)}))
+    else:
+        queue.put(('done', {'stage_timings': result.timings}))
@@ -0,0 +1,109 @@
+"""
+An in-memory store of the (long-running) report computations submitted
+through the report jobs API.
+
+A job is submitted to an executor (in the calculator, the bounded loky
+worker pool) and identified by a random id. Its status and, once
+complete, its result can then be retrieved from the store. Completed
+jobs are forgotten once their time-to-live has elapsed.
+
+"""
+import concurrent.futures
+import dataclasses
+import threading
+import time
+import typing
+import uuid
+
+
+PENDING = 'pending'
+RUNNING = 'running'
+DONE = 'done'
+ERROR = 'error'
+
+
+@dataclasses.dataclass
+class ReportJob:
+    #: The (random) identifier of the job.
+    job_id: str
+
+    #: The kind of result of the job (e.g. "json" or "html").
+    kind: str
+
+    #: The future of the computation.
+    future: concurrent.futures.Future
+
+    #: The time (from time.monotonic) at which the job was submitted.
+    submitted: float
+
+    #: The time at which the job completed, if it did.
+    completed: typing.Optional[float] = None
+
+    @property
+    def status(self) -> str:
+        if not self.future.done():
+            return RUNNING if self.future.running() else PENDING
+        return ERROR if self.future.exception() is not None else DONE
+
+    def result(self) -> typing.Any:
+        return self.future.result()
+
+    def error(self) -> typing.Optional[str]:
+        if self.status != ERROR:
+            return None
+        return str(self.future.exception())
+
+
+class ReportJobStore:
+    def __init__(self, ttl: float = 3600., clock: typing.Callable[[], float] = time.monotonic):
+        #: The time (s) for which the completed jobs are kept.
+        self.ttl = ttl
+        self._clock = clock
+        self._jobs: typing.Dict[str, ReportJob] = {}
+        self._lock = threading.Lock()
+
+    def submit(
+            self,
+            executor: concurrent.futures.Executor,
+            kind: str,
+            fn: typing.Callable[..., typing.Any],
+            *args,
+            **kwargs,
+    ) -> ReportJob:
+        """
+        Submit fn(*args, **kwargs) to the executor, and record it as a new job.
+        """
+        future = executor.submit(fn, *args, **kwargs)
+        job = ReportJob(job_id=uuid.uuid4().hex, kind=kind, future=future, submitted=self._clock())
+        with self._lock:
+            self._purge()
+            self._jobs[job.job_id] = job
+        future.add_done_callback(lambda _: self._completed(job))
+        return job
+
+    def get(self, job_id: str) -> typing.Optional[ReportJob]:
+        """
+        The job with the given id, or None if there is no such job (or if it
+        has expired).
+        """
+        with self._lock:
+            self._purge()
+            return self._jobs.get(job_id)
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._purge()
+            return len(self._jobs)
+
+    def _completed(self, job: ReportJob) -> None:
+        with self._lock:
+            job.completed = self._clock()
+
+    def _purge(self) -> None:
+        now = self._clock()
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.completed is not None and now - job.completed > self.ttl
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
@@ -0,0 +1,46 @@
+"""
+Warm-up of the report worker processes.
+
+A new worker lazily imports the scientific stack (scipy, sklearn,
+matplotlib, ...) and loads the data caches (weather data and stations
+KD-tree, ...) on its first report, which is therefore seconds slower than
+the following ones. warm_up_worker is used as the initializer of the
+workers, so that this cost is paid when the worker starts instead.
+
+"""
+import io
+import logging
+import time
+
+LOG = logging.getLogger("Calculator")
+
+
+def warm_up_worker(sample_size: int = 1_000) -> None:
+    """
+    Compute a small baseline model (and CO2 model and plot), loading all the
+    modules and data caches used by the reports. This is best effort: any
+    failure is logged, and left to the actual report to raise.
+    """
+    start = time.perf_counter()
+    try:
+        import matplotlib.pyplot as plt
+
+        from caimira.calculator.report import virus_report_data
+        from caimira.calculator.store.data_registry import DataRegistry
+        from caimira.calculator.validators.virus import virus_validator
+
+        form = virus_validator.VirusFormData.from_dict(
+            virus_validator.baseline_raw_form_data(), DataRegistry())
+        model = form.build_model(sample_size).exposure_models[0]
+        model.individual_infection_probability()
+        form.build_CO2_model(sample_size).concentration(model.exposed.presence_interval().boundaries()[0][1])
+        virus_report_data.interesting_times(model)
+
+        figure = plt.figure()
+        figure.add_subplot().plot([0, 1], [0, 1])
+        figure.savefig(io.BytesIO(), format='png')
+        plt.close(figure)
+    except Exception:
+        LOG.exception("The warm-up of the report worker failed")
+    else:
+        LOG.info(f"Report worker warmed up in {time.perf_counter() - start:.2f} s")
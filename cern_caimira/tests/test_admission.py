@@ -0,0 +1,91 @@
+import concurrent.futures
+import functools
+import json
+import threading
+
+import pytest
+
+import cern_caimira.apps.calculator
+from cern_caimira.apps.calculator.admission import AdmissionController
+
+
+@pytest.fixture
+def thread_executor():
+    with concurrent.futures.ThreadPoolExecutor(1) as executor:
+        yield executor
+
+
+@pytest.fixture
+def release():
+    release = threading.Event()
+    yield release
+    release.set()
+
+
+def test_admission_queue_depth(thread_executor, release):
+    admission = AdmissionController(lambda: thread_executor, max_workers=1, max_queue_depth=1)
+    assert admission.check_admission() is None
+
+    admission.submit(release.wait, 5)
+    assert admission.queue_depth == 0
+    assert admission.check_admission() is None
+    admission.submit(release.wait, 5)
+    assert admission.queue_depth == 1
+
+    rejection = admission.check_admission()
+    assert rejection.status_code == 503
+    assert rejection.retry_after >= 1
+    assert admission.metrics()['rejected'] == {'503': 1}
+
+
+def test_admission_queue_time_slo(thread_executor, release):
+    admission = AdmissionController(
+        lambda: thread_executor, max_workers=1, max_queue_depth=10, queue_time_slo=30.)
+    # Seed the (observed) service time.
+    admission._service_times.extend([20., 20.])
+
+    admission.submit(release.wait, 5)
+    # The next task is expected to wait for 20s.
+    assert admission.check_admission() is None
+    admission.submit(release.wait, 5)
+    # The next one for 40s.
+    rejection = admission.check_admission()
+    assert rejection.status_code == 429
+    assert rejection.retry_after == 10
+
+
+def test_admission_metrics(thread_executor):
+    admission = AdmissionController(lambda: thread_executor, max_workers=1)
+    future = admission.submit(sum, [1, 2, 3])
+    assert future.result(5) == 6
+
+    failing = admission.submit(functools.partial(int, 'invalid'))
+    with pytest.raises(ValueError):
+        failing.result(5)
+
+    metrics = admission.metrics()
+    assert metrics['admitted'] == 2
+    assert metrics['in_flight'] == 0
+    assert metrics['wait_time']['count'] == 1
+    assert metrics['service_time']['mean'] >= 0
+    json.dumps(metrics)
+
+
+@pytest.fixture
+def app(thread_executor):
+    app = cern_caimira.apps.calculator.make_app()
+    app.settings['report_executor'] = AdmissionController(
+        lambda: thread_executor, max_workers=1, max_queue_depth=0)
+    return app
+
+
+async def test_report_rejected(app, http_server_client, baseline_form_data, release):
+    app.settings['report_executor'].submit(release.wait, 5)
+
+    response = await http_server_client.fetch(
+        '/calculator/report-json', method='POST', body=json.dumps(baseline_form_data), raise_error=False)
+    assert response.code == 503
+    assert int(response.headers['Retry-After']) >= 1
+
+    response = await http_server_client.fetch('/calculator/metrics')
+    assert json.loads(response.body)['rejected'] == {'503': 1}
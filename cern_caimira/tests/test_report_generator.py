@@ -1,6 +1,9 @@
 import concurrent.futures
+import dataclasses
 from functools import partial
 import os
+import pickle
+import queue
 import time
 import json
 
@@ -9,7 +12,7 @@ import pytest
 
 from cern_caimira.apps.calculator import make_app
 from cern_caimira.apps.calculator import VirusReportGenerator
-from cern_caimira.apps.calculator.report.virus_report import readable_minutes
+from cern_caimira.apps.calculator.report.virus_report import readable_minutes, stream_report_stages
 import caimira.calculator.report.virus_report_data as rep_gen
 from caimira.calculator.validators.virus.virus_validator import VirusFormData
 
@@ -65,6 +68,38 @@ def test_fill_big_gaps__float_tolerance():
         [0, 2 + 1e-14, 4], gap_size=2) == [0, 2, 2 + 1e-14, 4]
 
 
+def test_fill_big_gaps__many_gaps():
+    times = [0., 0.1, 3., 3.05, 7.]
+    result = rep_gen.fill_big_gaps(times, gap_size=0.5)
+    assert set(times) <= set(result)
+    assert np.all(np.diff(result) > 0)
+    assert np.diff(result).max() <= 0.5 + 1e-12
+    assert len(result) == len(times) + 5 + 7
+
+
+def test_refine_by_curvature():
+    times = np.linspace(0., 4., 9)
+    # Flat, then a sharp change around t=3.
+    values = np.tanh(10 * (times - 3.))
+    result = rep_gen.refine_by_curvature(times, values, n_pts=40)
+    assert set(times) <= set(result)
+    assert len(times) < len(result) <= 40
+    assert np.all(np.diff(result) > 0)
+    result = np.array(result)
+    assert np.sum((result > 2.) & (result < 4.)) > np.sum(result < 2.)
+
+
+def test_interesting_times_adaptive(baseline_exposure_model):
+    result = rep_gen.interesting_times(
+        baseline_exposure_model, approx_n_pts=100, adaptive=True)
+    assert set(rep_gen.non_temp_transition_times(baseline_exposure_model)) <= set(result)
+    assert len(result) <= 100
+    # The concentration reaches its steady state within minutes of each
+    # presence change: points concentrate there rather than on the plateaus.
+    result = np.array(result)
+    assert np.sum(result < 0.5) > np.sum((result > 1.5) & (result < 3.5))
+
+
 def test_non_temp_transition_times(baseline_exposure_model):
     expected = [0.0, 4.0, 5.0, 8.0]
     result = rep_gen.non_temp_transition_times(baseline_exposure_model)
@@ -125,6 +160,39 @@ def test_expected_new_cases(baseline_form_with_sr: VirusFormData):
     np.testing.assert_almost_equal(sr_lr_expected_new_cases, lr_expected_new_cases + sr_lr_prob_inf * baseline_form_with_sr.short_range_occupants, 2)
 
 
+def test_alternative_scenarios_share_base_samples(baseline_form):
+    base_model = baseline_form.build_model(1_000).exposure_models[0]
+    scenarios = rep_gen.manufacture_alternative_scenarios(baseline_form, base_model)
+    assert set(scenarios) == {'No ventilation with Type I masks', 'Neither ventilation nor masks'}
+
+    base_cm = base_model.concentration_model[0]
+    for scenario in scenarios.values():
+        assert scenario.concentration_model[0].infected.virus is base_cm.infected.virus
+        assert scenario.concentration_model[0].room is base_cm.room
+        assert scenario.concentration_model[0].ventilation.air_exchange(base_cm.room, 10.) == 0.25
+
+    # The mask is unchanged in this scenario, hence so is the whole infected population.
+    no_mask = scenarios['Neither ventilation nor masks']
+    assert no_mask.concentration_model[0].infected is base_cm.infected
+    # The scenarios are paired: with the same samples, masks can only reduce the probability.
+    with_mask = scenarios['No ventilation with Type I masks']
+    assert np.all(with_mask.individual_infection_probability() <=
+                  no_mask.individual_infection_probability())
+
+
+def test_alternative_scenarios_without_hepa(baseline_form):
+    hepa_form = rep_gen.dataclass_utils.replace(baseline_form, hepa_option=True)
+    base_model = hepa_form.build_model(1_000).exposure_models[0]
+    scenario = rep_gen.manufacture_alternative_scenarios(hepa_form, base_model)[
+        'Base scenario without HEPA filter, with FFP2 masks']
+
+    base_ventilations = base_model.concentration_model[0].ventilation.ventilations
+    ventilations = scenario.concentration_model[0].ventilation.ventilations
+    assert ventilations == tuple(
+        vent for vent in base_ventilations if not isinstance(vent, rep_gen.models.HEPAFilter))
+    assert ventilations[0] is base_ventilations[0]
+
+
 def test_alternative_scenarios(baseline_form):
     """
     Tests if the alternative scenarios are only generated when
@@ -147,3 +215,49 @@ def test_alternative_scenarios(baseline_form):
         concurrent.futures.ThreadPoolExecutor, 1,
     ))
     assert "alternative_scenarios" not in report_data.keys()
+
+
+def test_report_pipeline_stages(baseline_form):
+    generator: VirusReportGenerator = make_app().settings['report_generator']
+    executor_factory = partial(concurrent.futures.ThreadPoolExecutor, 1)
+
+    pipeline = generator.report_pipeline(baseline_form, executor_factory)
+    assert pipeline.active_stages() == ['model', 'report_data', 'alternative_scenarios']
+
+    baseline_form.conditional_probability_viral_loads = True
+    pipeline = generator.report_pipeline(baseline_form, executor_factory)
+    assert {'conditional_probability', 'alternative_viral_load'} <= set(pipeline.active_stages())
+
+
+def test_stream_report_stages(baseline_form):
+    generator: VirusReportGenerator = make_app().settings['report_generator']
+    stream = queue.Queue()
+    stream_report_stages(generator, baseline_form, partial(concurrent.futures.ThreadPoolExecutor, 1), stream)
+
+    events = []
+    while not stream.empty():
+        events.append(stream.get())
+    stages = [stage for stage, _ in events]
+    # The core results come first, and the alternative scenarios depend on them.
+    assert stages[0] == 'report_data'
+    assert stages[-1] == 'done'
+    assert 'alternative_scenarios' in stages
+
+    report_data = events[0][1]
+    assert 'model' not in report_data
+    assert 0 < report_data['groups']['group_1']['prob_inf'] < 100
+    # The whole stream is serializable.
+    json.dumps(events)
+
+
+def test_template_environment_cached(tmp_path):
+    generator: VirusReportGenerator = make_app().settings['report_generator']
+    # The generator is pickled to the report workers: the environment is
+    # nevertheless shared by the copies of the generator.
+    copy = pickle.loads(pickle.dumps(generator))
+    assert copy.template_environment() is generator.template_environment()
+    assert 'common_text' in generator.template_environment().globals
+
+    cached = dataclasses.replace(generator, bytecode_cache_directory=str(tmp_path))
+    assert cached.template_environment() is not generator.template_environment()
+    assert list(tmp_path.iterdir())
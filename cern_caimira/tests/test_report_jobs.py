@@ -0,0 +1,88 @@
+import concurrent.futures
+import json
+import threading
+
+import pytest
+
+import cern_caimira.apps.calculator
+from cern_caimira.apps.calculator import report_jobs
+from cern_caimira.apps.calculator.report_jobs import ReportJobStore
+
+
+class FakeClock:
+    def __init__(self):
+        self.time = 0.
+
+    def __call__(self):
+        return self.time
+
+
+@pytest.fixture
+def executor():
+    with concurrent.futures.ThreadPoolExecutor(1) as executor:
+        yield executor
+
+
+def test_job_lifecycle(executor):
+    clock = FakeClock()
+    store = ReportJobStore(ttl=60., clock=clock)
+    started, release = threading.Event(), threading.Event()
+
+    def compute(value):
+        started.set()
+        release.wait(5)
+        return value * 2
+
+    job = store.submit(executor, 'json', compute, 21)
+    # The single worker is busy: the second job waits.
+    queued = store.submit(executor, 'json', compute, 1)
+    started.wait(5)
+    assert store.get(job.job_id).status == report_jobs.RUNNING
+    assert queued.status == report_jobs.PENDING
+
+    release.set()
+    job.future.result(5)
+    queued.future.result(5)
+    assert store.get(job.job_id).status == report_jobs.DONE
+    assert store.get(job.job_id).result() == 42
+
+    # The completed jobs expire after the TTL.
+    clock.time = 61.
+    assert store.get(job.job_id) is None
+    assert len(store) == 0
+
+
+def test_job_error(executor):
+    def fail():
+        raise ValueError("Invalid model")
+
+    store = ReportJobStore()
+    job = store.submit(executor, 'json', fail)
+    concurrent.futures.wait([job.future])
+    assert job.status == report_jobs.ERROR
+    assert job.error() == "Invalid model"
+
+
+@pytest.fixture
+def app():
+    return cern_caimira.apps.calculator.make_app()
+
+
+async def test_job_status_endpoint(app, http_server_client, executor):
+    job = app.settings['report_jobs'].submit(executor, 'json', dict, prob_inf=12.5)
+    concurrent.futures.wait([job.future])
+
+    response = await http_server_client.fetch(f'/calculator/report/jobs/{job.job_id}')
+    assert response.code == 200
+    assert json.loads(response.body) == {'prob_inf': 12.5}
+
+
+async def test_job_status_unknown(http_server_client):
+    response = await http_server_client.fetch('/calculator/report/jobs/0123abcd', raise_error=False)
+    assert response.code == 404
+
+
+async def test_job_submit_invalid(http_server_client):
+    response = await http_server_client.fetch(
+        '/calculator/report/jobs', method='POST', body=json.dumps({'invalid_item': 'foobar'}), raise_error=False)
+    assert response.code == 400
@@ -0,0 +1,13 @@
+import logging
+
+from caimira.calculator.models.data import weather
+from cern_caimira.apps.calculator.warmup import warm_up_worker
+
+
+def test_warm_up_worker(caplog):
+    with caplog.at_level(logging.INFO, logger="Calculator"):
+        warm_up_worker(sample_size=100)
+    assert "Report worker warmed up" in caplog.text
+    # The weather data and stations KD-tree are loaded.
+    assert weather.wx_data.cache_info().currsize == 1
+    assert weather._wx_station_kdtree.cache_info().currsize == 1
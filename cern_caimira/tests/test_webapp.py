@@ -1,6 +1,8 @@
+import json
 import os
 from pathlib import Path
 
+import numpy as np
 import pytest
 import tornado.testing
 
@@ -134,3 +136,43 @@ class TestError500(tornado.testing.AsyncHTTPTestCase):
         response = self.fetch('/')
         assert response.code == 500
         assert 'Unfortunately an error occurred when processing your request' in response.body.decode()
+
+
+class TestCO2Plot(tornado.testing.AsyncHTTPTestCase):
+    def get_app(self):
+        return cern_caimira.apps.calculator.make_app()
+
+    def post_plot(self, query: str):
+        times = [float(time) for time in np.round(np.arange(14., 17.5, 1 / 120), 4)]
+        # The CO2 concentration rises (occupied room) and then falls (ventilated room).
+        CO2 = [
+            440 + 800 * (1 - np.exp(-2 * (time - 14))) if time < 15.5 else
+            440 + 800 * (1 - np.exp(-3)) * np.exp(-3 * (time - 15.5))
+            for time in times
+        ]
+        body = {
+            'CO2_data': json.dumps({'times': times, 'CO2': CO2}),
+            'room_volume': 100, 'total_people': 4,
+            'exposed_start': '14:00', 'exposed_finish': '17:30',
+            'infected_start': '14:00', 'infected_finish': '17:30',
+            'exposed_lunch_option': False, 'infected_lunch_option': False,
+        }
+        return self.http_client.fetch(
+            self.get_url(f'/calculator/co2-fit/plot{query}'), method='POST', body=json.dumps(body),
+            headers={'Cookie': '_xsrf=61626364', 'X-XSRFToken': '61626364'},
+            raise_error=False, request_timeout=6 * _TIMEOUT,
+        )
+
+    @tornado.testing.gen_test(timeout=6 * _TIMEOUT)
+    def test_plot_data_only(self):
+        response = yield self.post_plot('?render=0')
+        assert response.code == 200
+        result = json.loads(response.body)
+        assert result['CO2_plot_img'] is None
+        assert result['transition_times'][0] == 14.
+        assert len(result['CO2_plot_data']['CO2']) == len(result['CO2_plot_data']['times'])
+
+    @tornado.testing.gen_test(timeout=_TIMEOUT)
+    def test_plot_invalid_format(self):
+        response = yield self.post_plot('?plot_format=gif')
+        assert response.code == 400